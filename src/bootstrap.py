@@ -0,0 +1,162 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data import Data
+
+
+class BootstrapEngine:
+    """
+    A class to compute bootstrap confidence intervals for the world and
+    region averages of the democracy index. Countries are resampled with
+    replacement within each region, and all resamples, regions and years are
+    evaluated with a single matrix product.
+    """
+    def __init__(self, data: Data = None):
+        data = Data() if data is None else data
+        panel = data.get_panel()
+
+        self.years = panel.columns.to_numpy()
+        regions = data.df.groupby("Country")["Region"].first().reindex(
+            panel.index)
+        self.regions = regions.cat.categories.to_numpy()
+        self.region_codes = regions.cat.codes.to_numpy()
+
+        values = panel.to_numpy()
+        self._valid = ~np.isnan(values)
+        self._values = np.where(self._valid, values, 0.0)
+        self._cache = {}
+
+    def _draw_weights(self, n_resamples: int,
+                      rng: np.random.Generator) -> np.ndarray:
+        """
+        Draws the resampling weights: how many times each country appears in
+        each resample, drawing as many countries from each region as the
+        region has.
+
+        Parameters
+        ----------
+        n_resamples : int
+            The number of resamples.
+        rng : np.random.Generator
+            The random number generator.
+
+        Returns
+        -------
+        np.ndarray
+            The weights, with shape (n_resamples, n_countries).
+        """
+        weights = np.zeros((n_resamples, len(self.region_codes)))
+        for code in range(len(self.regions)):
+            members = np.flatnonzero(self.region_codes == code)
+            weights[:, members] = rng.multinomial(
+                len(members), np.full(len(members), 1 / len(members)),
+                size=n_resamples)
+        return weights
+
+    def _resample(self, n_resamples: int, seed) -> tuple:
+        """
+        Computes the world and region averages of every resample.
+
+        Parameters
+        ----------
+        n_resamples : int
+            The number of resamples.
+        seed : int or np.random.Generator
+            The seed or random number generator.
+
+        Returns
+        -------
+        tuple
+            The world averages, with shape (n_resamples, n_years), and the
+            region averages, with shape (n_resamples, n_regions, n_years).
+        """
+        rng = np.random.default_rng(seed)
+        weights = self._draw_weights(n_resamples, rng)
+
+        # Stack the world and one masked copy of the panel per region so
+        # that a single product yields every average
+        membership = np.column_stack([
+            np.ones(len(self.region_codes)),
+            self.region_codes[:, None] == np.arange(len(self.regions))])
+        sums = weights @ (membership[:, :, None]
+                          * self._values[:, None, :]).reshape(
+                              len(self.region_codes), -1)
+        counts = weights @ (membership[:, :, None]
+                            * self._valid[:, None, :]).reshape(
+                                len(self.region_codes), -1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (sums / counts).reshape(
+                n_resamples, membership.shape[1], len(self.years))
+        return means[:, 0], means[:, 1:]
+
+    def get_bands(self, n_resamples: int = 10_000,
+                  confidence: float = 0.95, seed=None) -> tuple:
+        """
+        Returns the bootstrap confidence intervals of the world and region
+        averages for every year. Results are cached when `seed` is an
+        integer.
+
+        Parameters
+        ----------
+        n_resamples : int, optional
+            The number of resamples. By default 10000.
+        confidence : float, optional
+            The confidence level of the intervals. By default 0.95.
+        seed : int or np.random.Generator, optional
+            The seed or random number generator.
+
+        Returns
+        -------
+        tuple
+            Two DataFrames: the world bands, with the columns `Year`,
+            `DemocracyIndex` (the observed average), `Low`, `Median` and
+            `High`, and the region bands, with an additional `Region`
+            column.
+        """
+        key = (n_resamples, confidence, seed)
+        if isinstance(seed, (int, np.integer)) and key in self._cache:
+            return self._cache[key]
+
+        world, regions = self._resample(n_resamples, seed)
+        alpha = (1 - confidence) / 2
+        quantiles = [alpha, 0.5, 1 - alpha]
+        world_q = np.nanquantile(world, quantiles, axis=0)
+        region_q = np.nanquantile(regions, quantiles, axis=0)
+
+        weights = self._valid.astype(float)
+        world_mean = (self._values.sum(axis=0) / weights.sum(axis=0))
+        world_df = pd.DataFrame({
+            "Year": self.years, "DemocracyIndex": world_mean,
+            "Low": world_q[0], "Median": world_q[1], "High": world_q[2]})
+
+        n_regions, n_years = len(self.regions), len(self.years)
+        region_sums = np.zeros((n_regions, n_years))
+        region_counts = np.zeros((n_regions, n_years))
+        np.add.at(region_sums, self.region_codes, self._values)
+        np.add.at(region_counts, self.region_codes, weights)
+        region_df = pd.DataFrame({
+            "Region": np.repeat(self.regions, n_years),
+            "Year": np.tile(self.years, n_regions),
+            "DemocracyIndex": (region_sums / region_counts).ravel(),
+            "Low": region_q[0].ravel(), "Median": region_q[1].ravel(),
+            "High": region_q[2].ravel()})
+
+        if isinstance(seed, (int, np.integer)):
+            self._cache[key] = (world_df, region_df)
+        return world_df, region_df
+
+
+@lru_cache(maxsize=None)
+def get_bootstrap_engine() -> BootstrapEngine:
+    """
+    Returns the bootstrap engine for the democracy index data, built once
+    per session.
+
+    Returns
+    -------
+    BootstrapEngine
+        The bootstrap engine.
+    """
+    return BootstrapEngine()
@@ -0,0 +1,203 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data import Data, REGIME_TYPES, assign_regime_codes
+
+
+def segment(values: np.ndarray, max_breaks: int = 3, min_size: int = 2,
+            min_shift: float = 0.5, penalty: float = None) -> np.ndarray:
+    """
+    Splits every row of a matrix into segments of constant mean by binary
+    segmentation. At each step, and for all rows at once, the split that
+    most reduces the squared error within its segment is added if the
+    reduction exceeds the penalty and the means on both sides differ by at
+    least `min_shift`. The work grows linearly with the number of rows.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The series, with shape (n_rows, n_points) and no missing values.
+    max_breaks : int, optional
+        The maximum number of breaks per row. By default 3.
+    min_size : int, optional
+        The minimum number of points of a segment. By default 2.
+    min_shift : float, optional
+        The minimum difference between the means of two consecutive
+        segments. By default 0.5.
+    penalty : float, optional
+        The minimum reduction of the squared error of a split. By default
+        `2 * sigma² * log(n_points)` for each row, where `sigma` is a
+        robust estimate of the noise from the differences between
+        consecutive points (at least 0.1).
+
+    Returns
+    -------
+    np.ndarray
+        A boolean array with the shape of `values` that is True at the first
+        point of every segment after the first one.
+    """
+    values = np.asarray(values, dtype=float)
+    n_rows, n_points = values.shape
+    if penalty is None:
+        sigma = np.median(np.abs(np.diff(values, axis=1)), axis=1) \
+            / (0.6745 * np.sqrt(2))
+        penalty = 2 * np.maximum(sigma, 0.1) ** 2 * np.log(n_points)
+    penalty = np.broadcast_to(penalty, (n_rows,))
+
+    sums = np.hstack([np.zeros((n_rows, 1)), np.cumsum(values, axis=1)])
+    positions = np.arange(n_points)
+    starts = np.zeros((n_rows, n_points), dtype=bool)
+    starts[:, 0] = True
+    rows = np.arange(n_rows)
+
+    for _ in range(max_breaks):
+        # The segment [start, end) that contains each point
+        start = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+        next_start = np.where(np.hstack([starts[:, 1:],
+                                         np.ones((n_rows, 1), dtype=bool)]),
+                              positions + 1, n_points)
+        end = np.minimum.accumulate(next_start[:, ::-1], axis=1)[:, ::-1]
+
+        # Splitting the segment at t leaves [start, t) and [t, end)
+        n_left = positions - start
+        n_right = end - positions
+        total = np.take_along_axis(sums, end, axis=1)
+        left = sums[:, :-1] - np.take_along_axis(sums, start, axis=1)
+        right = total - sums[:, :-1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shift = right / n_right - left / n_left
+            gain = n_left * n_right / (n_left + n_right) * shift ** 2
+        valid = (n_left >= min_size) & (n_right >= min_size) \
+            & (np.abs(shift) >= min_shift)
+        gain = np.where(valid, gain, -np.inf)
+
+        best = gain.argmax(axis=1)
+        accept = gain[rows, best] > penalty
+        if not accept.any():
+            break
+        starts[rows[accept], best[accept]] = True
+
+    starts[:, 0] = False
+    return starts
+
+
+class BreakDetector:
+    """
+    A class to find structural breaks (sharp, lasting changes in the level
+    of the democracy index) in every country series at once.
+    """
+    def __init__(self, data: Data = None):
+        data = Data() if data is None else data
+        panel = data.get_panel()
+
+        self.countries = panel.index.to_numpy()
+        self.years = panel.columns.to_numpy()
+        self.regions = data.df.groupby("Country")["Region"].first().reindex(
+            self.countries).astype(str).to_numpy()
+        # Missing years are interpolated so that every series has a value
+        # for every year
+        self.values = panel.T.interpolate(
+            limit_direction="both").T.to_numpy(dtype=float)
+        self._cache = {}
+
+    def get_breaks(self, max_breaks: int = 3, min_size: int = 2,
+                   min_shift: float = 0.5,
+                   penalty: float = None) -> pd.DataFrame:
+        """
+        Returns the breaks of every country, ranked by the size of the
+        change in the mean level of the index. Results are cached for each
+        set of parameters.
+
+        Parameters
+        ----------
+        max_breaks : int, optional
+            The maximum number of breaks per country. By default 3.
+        min_size : int, optional
+            The minimum number of years between breaks. By default 2.
+        min_shift : float, optional
+            The minimum change in the mean level. By default 0.5.
+        penalty : float, optional
+            The minimum reduction of the squared error of a break (see
+            `segment`).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per break, with the columns `Rank`, `Country`, `Region`,
+            `Year` (the first year after the break), `Before` and `After`
+            (the mean index of the segments on each side), `Shift`
+            (`After` - `Before`), `Jump` (the change between the two years
+            around the break), `RegimeBefore`, `RegimeAfter` (the regime
+            types of those two years) and `RegimeCrossing`.
+        """
+        key = (max_breaks, min_size, min_shift, penalty)
+        if key in self._cache:
+            return self._cache[key]
+
+        starts = segment(self.values, max_breaks, min_size, min_shift,
+                         penalty)
+        rows, cols = np.nonzero(starts)
+
+        # The mean of every segment, from the cumulative sums of each row
+        segment_id = np.cumsum(starts, axis=1)
+        n_segments = segment_id.max(axis=1) + 1
+        offsets = np.concatenate([[0], np.cumsum(n_segments)[:-1]])
+        flat_id = (segment_id + offsets[:, None]).ravel()
+        means = np.bincount(flat_id, self.values.ravel()) \
+            / np.bincount(flat_id)
+        after_id = offsets[rows] + segment_id[rows, cols]
+        before, after = means[after_id - 1], means[after_id]
+
+        previous = self.values[rows, cols - 1]
+        current = self.values[rows, cols]
+        regime_before = assign_regime_codes(previous)
+        regime_after = assign_regime_codes(current)
+        regime_types = np.array(REGIME_TYPES)
+
+        df = pd.DataFrame({
+            "Country": self.countries[rows], "Region": self.regions[rows],
+            "Year": self.years[cols], "Before": before, "After": after,
+            "Shift": after - before, "Jump": current - previous,
+            "RegimeBefore": regime_types[regime_before],
+            "RegimeAfter": regime_types[regime_after],
+            "RegimeCrossing": regime_before != regime_after})
+        df = df.iloc[np.argsort(-np.abs(df["Shift"].to_numpy()),
+                                kind="stable")].reset_index(drop=True)
+        df.insert(0, "Rank", np.arange(1, len(df) + 1))
+        self._cache[key] = df
+        return df
+
+    def get_top_countries(self, n: int = 6, **kwargs) -> list[str]:
+        """
+        Returns the countries with the largest breaks.
+
+        Parameters
+        ----------
+        n : int, optional
+            The number of countries. By default 6.
+        **kwargs
+            Additional arguments for `get_breaks`.
+
+        Returns
+        -------
+        list[str]
+            The countries, from the largest break.
+        """
+        breaks = self.get_breaks(**kwargs)
+        return breaks["Country"].drop_duplicates().head(n).tolist()
+
+
+@lru_cache(maxsize=None)
+def get_break_detector() -> BreakDetector:
+    """
+    Returns the break detector for the democracy index data, built once per
+    session.
+
+    Returns
+    -------
+    BreakDetector
+        The break detector.
+    """
+    return BreakDetector()
@@ -0,0 +1,278 @@
+import hashlib
+import itertools
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from data import (Data, RAW_DATA, REGIME_THRESHOLDS, REGIME_TYPES,
+                  assign_regime_codes)
+
+
+CACHE_DIR = "data/interim/cube"
+# Version of the cube layout, part of the key of the cached cubes
+VERSION = 1
+
+# Label of the roll-up over a dimension
+ALL = "All"
+
+DIMENSIONS = ["Region", "RegimeType", "Year"]
+MEASURES = ["Count", "Sum", "Mean", "Min", "Max"]
+
+
+class Cube:
+    """
+    A pre-aggregated cube of the democracy index by region, regime type and
+    year. Every cell, including the roll-ups over any dimension (labelled
+    `ALL`), stores the number of observations, the sum, mean, minimum and
+    maximum of the index and the countries it contains, so that any slice
+    is read from arrays without scanning the data.
+
+    The regime type of each observation is that of its own year, not the
+    latest one. Counts over several years count country-years.
+    """
+    def __init__(self, data: Data = None):
+        data = Data() if data is None else data
+        df = data.df
+
+        self.regions = sorted(df["Region"].astype(str).unique()) + [ALL]
+        self.regime_types = REGIME_TYPES + [ALL]
+        self.years = sorted(df["Year"].unique().tolist()) + [ALL]
+        self._index = [{label: i for i, label in enumerate(labels)}
+                       for labels in (self.regions, self.regime_types,
+                                      self.years)]
+
+        codes = pd.DataFrame({
+            "Region": pd.Index(self.regions).get_indexer(
+                df["Region"].astype(str)),
+            "RegimeType": assign_regime_codes(df["DemocracyIndex"]),
+            "Year": pd.Index(self.years).get_indexer(df["Year"]),
+            "Country": df["Country"].to_numpy(),
+            "DemocracyIndex": df["DemocracyIndex"].to_numpy()})
+        codes = codes[codes["RegimeType"] >= 0]
+
+        shape = (len(self.regions), len(self.regime_types), len(self.years))
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.sum = np.zeros(shape)
+        self.min = np.full(shape, np.nan)
+        self.max = np.full(shape, np.nan)
+        self.countries = np.empty(shape, dtype=object)
+        self.countries.fill(())
+
+        # One aggregation per subset of the dimensions; the other ones are
+        # rolled up into their `ALL` position
+        for n in range(len(DIMENSIONS) + 1):
+            for kept in itertools.combinations(DIMENSIONS, n):
+                if kept:
+                    groups = codes.groupby(list(kept))
+                    stats = groups["DemocracyIndex"].agg(
+                        ["count", "sum", "min", "max"])
+                    members = groups["Country"].unique()
+                    keys = stats.index.to_frame(index=False)
+                else:
+                    values = codes["DemocracyIndex"]
+                    stats = pd.DataFrame({
+                        "count": [values.count()], "sum": [values.sum()],
+                        "min": [values.min()], "max": [values.max()]})
+                    members = pd.Series([codes["Country"].unique()])
+                    keys = pd.DataFrame(index=[0])
+                position = tuple(
+                    keys[d].to_numpy() if d in kept
+                    else np.full(len(stats), shape[i] - 1)
+                    for i, d in enumerate(DIMENSIONS))
+                self.count[position] = stats["count"].to_numpy()
+                self.sum[position] = stats["sum"].to_numpy()
+                self.min[position] = stats["min"].to_numpy()
+                self.max[position] = stats["max"].to_numpy()
+                cells = np.empty(len(stats), dtype=object)
+                cells[:] = [tuple(sorted(m)) for m in members]
+                self.countries[position] = cells
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(self.count > 0, self.sum / self.count,
+                                 np.nan)
+
+    def _position(self, region: str = None, regime_type: str = None,
+                  year: int = None) -> tuple:
+        """
+        Returns the position of a cell. None stands for the roll-up over a
+        dimension.
+
+        Parameters
+        ----------
+        region : str, optional
+            The region.
+        regime_type : str, optional
+            The regime type.
+        year : int, optional
+            The year.
+
+        Returns
+        -------
+        tuple
+            The position of the cell in the arrays.
+        """
+        try:
+            return tuple(index[ALL if label is None else label]
+                         for index, label in zip(
+                             self._index, (region, regime_type, year)))
+        except KeyError as e:
+            raise KeyError(f"Unknown label: {e.args[0]}.") from None
+
+    def get(self, region: str = None, regime_type: str = None,
+            year: int = None) -> dict:
+        """
+        Returns the aggregates of a cell. Leave a dimension as None to roll
+        it up (e.g. `get(year=2024)` gives the world in 2024).
+
+        Parameters
+        ----------
+        region : str, optional
+            The region.
+        regime_type : str, optional
+            The regime type.
+        year : int, optional
+            The year.
+
+        Returns
+        -------
+        dict
+            The `Count`, `Sum`, `Mean`, `Min` and `Max` of the democracy
+            index and the sorted tuple of `Countries`.
+        """
+        position = self._position(region, regime_type, year)
+        return {"Count": int(self.count[position]),
+                "Sum": float(self.sum[position]),
+                "Mean": float(self.mean[position]),
+                "Min": float(self.min[position]),
+                "Max": float(self.max[position]),
+                "Countries": self.countries[position]}
+
+    def get_table(self, rows: str = "Region", columns: str = "Year",
+                  measure: str = "Mean", **fixed) -> pd.DataFrame:
+        """
+        Returns a two-dimensional slice of the cube, including the roll-up
+        row and column.
+
+        Parameters
+        ----------
+        rows : str, optional
+            The dimension of the rows (see `DIMENSIONS`). By default
+            "Region".
+        columns : str, optional
+            The dimension of the columns. By default "Year".
+        measure : str, optional
+            The measure (see `MEASURES`). By default "Mean".
+        **fixed
+            The label of the remaining dimension, as `region`,
+            `regime_type` or `year`. By default it is rolled up.
+
+        Returns
+        -------
+        pd.DataFrame
+            The slice.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: {measure}.")
+        array = getattr(self, measure.lower())
+        names = {"Region": "region", "RegimeType": "regime_type",
+                 "Year": "year"}
+        (other,) = set(DIMENSIONS) - {rows, columns}
+        axis = DIMENSIONS.index(other)
+        label = fixed.get(names[other])
+        index = self._index[axis][ALL if label is None else label]
+        table = np.take(array, index, axis=axis)
+        if DIMENSIONS.index(rows) > DIMENSIONS.index(columns):
+            table = table.T
+        labels = [self.regions, self.regime_types, self.years]
+        return pd.DataFrame(
+            table,
+            index=pd.Index(labels[DIMENSIONS.index(rows)], name=rows),
+            columns=pd.Index(labels[DIMENSIONS.index(columns)],
+                             name=columns))
+
+
+def get_source_hash(path: str = RAW_DATA) -> str:
+    """
+    Returns the SHA-256 hash of the raw data file.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the file. By default the democracy index CSV file.
+
+    Returns
+    -------
+    str
+        The hexadecimal hash.
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_cache_key(source_hash: str) -> str:
+    """
+    Returns the key of a cached cube: the SHA-256 hash of the raw data hash,
+    the regime types and thresholds and the cube version, so that changing
+    any of them invalidates the cached cubes.
+
+    Parameters
+    ----------
+    source_hash : str
+        The hash of the raw data file (see `get_source_hash`).
+
+    Returns
+    -------
+    str
+        The hexadecimal key.
+    """
+    fingerprint = json.dumps([VERSION, REGIME_TYPES, REGIME_THRESHOLDS,
+                              source_hash])
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+_cubes = {}
+_keys = {}
+
+
+def get_cube() -> Cube:
+    """
+    Returns the cube of the current raw data. It is rebuilt only when the
+    hash of the raw data file changes (the file is only hashed again when
+    its size or modification time change) or the regime types, thresholds
+    or `VERSION` change (see `get_cache_key`), and stored in `CACHE_DIR`
+    between sessions.
+
+    Returns
+    -------
+    Cube
+        The cube.
+    """
+    stat = os.stat(RAW_DATA)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if stamp not in _keys:
+        _keys.clear()
+        _keys[stamp] = get_cache_key(get_source_hash())
+    key = _keys[stamp]
+
+    if key not in _cubes:
+        path = os.path.join(CACHE_DIR, f"{key}.pkl")
+        cube = None
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    cube = pickle.load(f)
+            except (pickle.UnpicklingError, AttributeError, EOFError,
+                    ImportError):
+                cube = None
+        if cube is None:
+            cube = Cube()
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(path, "wb") as f:
+                pickle.dump(cube, f)
+        _cubes.clear()
+        _cubes[key] = cube
+    return _cubes[key]
+
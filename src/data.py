@@ -1,7 +1,22 @@
+import io
+from functools import lru_cache
+
 import pandas as pd
 import geopandas as gpd
 import numpy as np
 
+from config import Config
+from names import NameIndex, take_join
+from validation import Schema, validate
+
+# Regime types ordered from least to most democratic, and the democracy index
+# thresholds that separate them
+REGIME_TYPES = ["Authoritarian", "Hybrid regime",
+                "Flawed democracy", "Full democracy"]
+REGIME_THRESHOLDS = [4.0, 6.0, 8.0]
+
+RAW_DATA = "data/raw/democracy_index.csv"
+
 
 class Data:
     """
@@ -13,9 +28,13 @@ class Data:
 
     def _setup_data(self) -> None:
         """
-        Load the data from the CSV file and preprocess it.
+        Load the data from the CSV file, validate it (see `get_schema`) and
+        preprocess it.
         """
-        self.df = pd.read_csv("data/raw/democracy_index.csv")
+        with open(RAW_DATA, "rb") as f:
+            content = f.read()
+        self.df = pd.read_csv(io.BytesIO(content))
+        validate(self.df, get_schema(), content)
         self.df = self.df[self.df.columns.drop(
             list(self.df.filter(regex=' rank')))]
         self.df["Region"] = self.df["Region"].astype("category")
@@ -113,6 +132,23 @@ class Data:
         """
         return self.df[self.df[key].isin(values)]
 
+    def get_panel(self, values: str = "DemocracyIndex") -> pd.DataFrame:
+        """
+        Returns the data as a table with one row per country (sorted by
+        name) and one column per year (sorted in ascending order).
+
+        Parameters
+        ----------
+        values : str, optional
+            The column to use for the values. By default "DemocracyIndex".
+
+        Returns
+        -------
+        pd.DataFrame
+            The country-by-year table.
+        """
+        return self.df.pivot(index="Country", columns="Year", values=values)
+
     def get_world_average(self) -> pd.DataFrame:
         """
         Returns the world average of the democracy index for each year.
@@ -142,6 +178,78 @@ class Data:
                     name="DemocracyIndex")
 
 
+@lru_cache(maxsize=None)
+def get_schema() -> Schema:
+    """
+    Returns the schema of the raw democracy index table: scores between 0
+    and 10, the regime types and thresholds of the project and the regions
+    of the configuration.
+
+    Returns
+    -------
+    Schema
+        The schema.
+    """
+    return Schema(regions=list(Config().region_colors),
+                  regime_types=REGIME_TYPES, thresholds=REGIME_THRESHOLDS)
+
+
+@lru_cache(maxsize=None)
+def _read_countries() -> gpd.GeoDataFrame:
+    """
+    Reads the world countries shapefile once per session.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        The world countries.
+    """
+    return gpd.read_file(
+        "data/external/ne_110m_admin_0_countries/"
+        "ne_110m_admin_0_countries.shp")
+
+
+def load_countries() -> gpd.GeoDataFrame:
+    """
+    Returns a copy of the world countries shapefile (the file is only read
+    from disk the first time).
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        The world countries.
+    """
+    return _read_countries().copy()
+
+
+@lru_cache(maxsize=None)
+def get_name_index() -> NameIndex:
+    """
+    Returns the country name reconciliation index, built from the countries
+    in the democracy index data and the names and ISO codes of the world
+    countries shapefile. The index is built once and cached.
+
+    Returns
+    -------
+    NameIndex
+        The name reconciliation index.
+    """
+    return NameIndex(Data().df["Country"].unique(), geo=_read_countries())
+
+
+def get_join_report() -> pd.DataFrame:
+    """
+    Returns a report of how the names of the world countries shapefile were
+    matched to the countries in the democracy index data.
+
+    Returns
+    -------
+    pd.DataFrame
+        The coverage report (see `NameIndex.coverage_report`).
+    """
+    return get_name_index().coverage_report(_read_countries()["NAME"])
+
+
 def get_merged_dataframe() -> pd.DataFrame:
     """
     Returns a merged DataFrame of the democracy index data and the world
@@ -153,31 +261,16 @@ def get_merged_dataframe() -> pd.DataFrame:
         A DataFrame containing the merged data.
     """
     data = Data().df
-    countries = gpd.read_file(
-        "data/external/ne_110m_admin_0_countries/"
-        "ne_110m_admin_0_countries.shp")
+    countries = load_countries()
+    name_index = get_name_index()
 
-    # Use names in `data`
-    to_replace = [
-        "Bosnia and Herz.", "Côte d'Ivoire", "United States of America",
-        "Central African Rep.", "Eq. Guinea", "Congo", "eSwatini",
-        "Czechia", "Dominican Rep.", "Dem. Rep. Congo", "Timor-Leste",
-        "Greenland", "Falkland Is."]
-    value = [
-        "Bosnia and Herzegovina", "Ivory Coast", "United States",
-        "Central African Republic", "Equatorial Guinea",
-        "Republic of the Congo", "Eswatini", "Czech Republic",
-        "Dominican Republic", "Democratic Republic of the Congo",
-        "East Timor", "Denmark", "Argentina"]
-    countries.replace(to_replace=to_replace, value=value, inplace=True)
-
-    merged_df = countries.merge(data, left_on="NAME", right_on="Country",
-                                how="left")
+    merged_df = take_join(countries, name_index.lookup(countries["NAME"]),
+                          data, name_index.lookup(data["Country"]))
 
     return merged_df
 
 
-def get_yearly_data(year: int) -> pd.DataFrame:
+def get_yearly_data(year: int, data: Data = None) -> pd.DataFrame:
     """
     Returns a DataFrame filtered by the given year, specified as an int.
     #TODO: Remove this function and use the equivalent in the Data class
@@ -187,13 +280,15 @@ def get_yearly_data(year: int) -> pd.DataFrame:
     ----------
     year : int
         The year to filter by.
+    data : Data, optional
+        The data to use. By default a new `Data` instance is created.
 
     Returns
     -------
     pd.DataFrame
         The filtered DataFrame.
     """
-    df = Data().df
+    df = (Data() if data is None else data).df
     df = df[df["Year"] == year]
 
     # Remap regime types to this year
@@ -251,8 +346,30 @@ def assign_regime_type(democracy_index: float) -> str:
     return regime_type
 
 
-def get_index_change_geographic_data(start_year: int,
-                                     end_year: int) -> pd.DataFrame:
+def assign_regime_codes(democracy_index: np.ndarray) -> np.ndarray:
+    """
+    Assigns regime types to an array of democracy index values, returning
+    the position of each regime type in `REGIME_TYPES` (or -1 for missing
+    values).
+
+    Parameters
+    ----------
+    democracy_index : np.ndarray
+        The democracy index values.
+
+    Returns
+    -------
+    np.ndarray
+        The regime codes, with the same shape as the input.
+    """
+    democracy_index = np.asarray(democracy_index, dtype=float)
+    codes = np.digitize(democracy_index, REGIME_THRESHOLDS)
+    return np.where(np.isnan(democracy_index), -1, codes)
+
+
+def get_index_change_geographic_data(start_year: int, end_year: int,
+                                     merged_df: pd.DataFrame = None
+                                     ) -> pd.DataFrame:
     """
     Returns a DataFrame containing the democracy index change between two
     years, specified as ints, together with geographic data for each country.
@@ -263,6 +380,8 @@ def get_index_change_geographic_data(start_year: int,
         The starting year.
     end_year : int
         The ending year.
+    merged_df : pd.DataFrame, optional
+        The output of `get_merged_dataframe`. By default it is computed.
 
     Returns
     -------
@@ -270,7 +389,7 @@ def get_index_change_geographic_data(start_year: int,
         The DataFrame containing the democracy index change and geographic
         data.
     """
-    df = get_merged_dataframe()
+    df = get_merged_dataframe() if merged_df is None else merged_df
     df = df[df["NAME"] != "Antarctica"]
     index_change = df[df["Year"] == end_year]["DemocracyIndex"].to_numpy() \
         - df[df["Year"] == start_year]["DemocracyIndex"].to_numpy()
@@ -279,7 +398,8 @@ def get_index_change_geographic_data(start_year: int,
     return df
 
 
-def get_migration_matrix(start_year: int, end_year: int) -> np.ndarray:
+def get_migration_matrix(start_year: int, end_year: int,
+                         data: Data = None) -> np.ndarray:
     """
     Calculates the regime types migration matrix (changes in regime types)
     between two years, specified as ints.
@@ -290,14 +410,16 @@ def get_migration_matrix(start_year: int, end_year: int) -> np.ndarray:
         The starting year.
     end_year : int
         The ending year.
+    data : Data, optional
+        The data to use. By default a new `Data` instance is created.
 
     Returns
     -------
     np.ndarray
         The migration matrix.
     """
-    df1 = get_yearly_data(start_year)
-    df2 = get_yearly_data(end_year)
+    df1 = get_yearly_data(start_year, data)
+    df2 = get_yearly_data(end_year, data)
 
     regimes = ["Authoritarian", "Hybrid regime",
                "Flawed democracy", "Full democracy"]
@@ -0,0 +1,184 @@
+import asyncio
+import time
+import traceback
+
+import pandas as pd
+
+import plots
+
+
+class ExportJob:
+    """
+    A figure to export: the function that builds it, its arguments, the
+    output name and formats and the function that writes it.
+    """
+    def __init__(self, name: str, builder, kwargs: dict = None,
+                 formats: tuple = ("html", "png"), writer=None):
+        """
+        Parameters
+        ----------
+        name : str
+            The output file name, without extension.
+        builder : callable
+            A `plots.plot_*` function. It is called with `write=False` and
+            must return the figure.
+        kwargs : dict, optional
+            The keyword arguments of `builder`.
+        formats : tuple, optional
+            The formats to write, among "html" and "png". By default both.
+        writer : callable, optional
+            A function with the signature of `plots.write_figure` that
+            writes the figure. By default `plots.write_figure`; use
+            `static_plots.write_figure` for Matplotlib figures.
+        """
+        self.name = name
+        self.builder = builder
+        self.kwargs = kwargs or {}
+        self.formats = formats
+        self.writer = writer or plots.write_figure
+
+    def __repr__(self) -> str:
+        return f"ExportJob({self.name!r})"
+
+
+async def _produce(jobs: list[ExportJob], queue: asyncio.Queue,
+                   results: list, n_consumers: int) -> None:
+    """
+    Builds the figures one by one in a worker thread and puts them in the
+    queue. Waiting on the bounded queue stops the producer from running
+    ahead of the writers.
+
+    Parameters
+    ----------
+    jobs : list[ExportJob]
+        The jobs to run.
+    queue : asyncio.Queue
+        The queue of built figures.
+    results : list
+        The list where the outcome of each stage is recorded.
+    n_consumers : int
+        The number of consumers, which are each sent a stop signal at the
+        end.
+    """
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            fig = await asyncio.to_thread(job.builder, write=False,
+                                          **job.kwargs)
+        except Exception as e:
+            results.append(_result(job, "build", start, e))
+            continue
+        results.append(_result(job, "build", start))
+        await queue.put((job, fig))
+    for _ in range(n_consumers):
+        await queue.put(None)
+
+
+async def _consume(queue: asyncio.Queue, results: list) -> None:
+    """
+    Takes built figures from the queue and writes every format of each one
+    concurrently in worker threads.
+
+    Parameters
+    ----------
+    queue : asyncio.Queue
+        The queue of built figures.
+    results : list
+        The list where the outcome of each stage is recorded.
+    """
+    while True:
+        item = await queue.get()
+        if item is None:
+            queue.task_done()
+            return
+        job, fig = item
+
+        async def write(fmt: str) -> None:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(job.writer, fig, job.name, (fmt,))
+            except Exception as e:
+                results.append(_result(job, fmt, start, e))
+            else:
+                results.append(_result(job, fmt, start))
+
+        await asyncio.gather(*(write(fmt) for fmt in job.formats))
+        queue.task_done()
+
+
+def _result(job: ExportJob, stage: str, start: float,
+            error: Exception = None) -> dict:
+    """
+    Records the outcome of a stage of a job.
+
+    Parameters
+    ----------
+    job : ExportJob
+        The job.
+    stage : str
+        The stage ("build" or the output format).
+    start : float
+        The `time.perf_counter` value at the start of the stage.
+    error : Exception, optional
+        The error raised by the stage, if any.
+
+    Returns
+    -------
+    dict
+        The record.
+    """
+    return {
+        "Job": job.name, "Stage": stage,
+        "Seconds": time.perf_counter() - start,
+        "Error": None if error is None else "".join(
+            traceback.format_exception_only(type(error), error)).strip()}
+
+
+async def run_pipeline(jobs: list[ExportJob], n_writers: int = 2,
+                       queue_size: int = 4) -> pd.DataFrame:
+    """
+    Runs the export jobs, overlapping the building of a figure with the
+    writing of the previous ones. A failed stage is recorded and does not
+    stop the other jobs.
+
+    Parameters
+    ----------
+    jobs : list[ExportJob]
+        The jobs to run.
+    n_writers : int, optional
+        The number of concurrent writers. By default 2.
+    queue_size : int, optional
+        The maximum number of built figures waiting to be written. By
+        default 4.
+
+    Returns
+    -------
+    pd.DataFrame
+        A report with one row per job stage and the columns `Job`, `Stage`,
+        `Seconds` and `Error` (None for successful stages).
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    results = []
+    await asyncio.gather(
+        _produce(jobs, queue, results, n_writers),
+        *(_consume(queue, results) for _ in range(n_writers)))
+    return pd.DataFrame(results, columns=["Job", "Stage", "Seconds", "Error"])
+
+
+def export(jobs: list[ExportJob], **kwargs) -> pd.DataFrame:
+    """
+    Runs the export pipeline synchronously (see `run_pipeline`).
+
+    Parameters
+    ----------
+    jobs : list[ExportJob]
+        The jobs to run.
+    **kwargs
+        Additional arguments for `run_pipeline`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The report of the run.
+    """
+    return asyncio.run(run_pipeline(jobs, **kwargs))
@@ -0,0 +1,512 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from data import load_countries, get_name_index
+
+
+# Simplification tolerances, in degrees, for each level of detail
+DETAIL_LEVELS = {
+    "high": 0.0,
+    "medium": 0.1,
+    "low": 0.4,
+}
+
+# Number of grid steps per axis used to quantize the coordinates
+QUANTIZATION = 10_000
+
+CACHE_DIR = "data/interim/geometry"
+# Version of the geometry pipeline, part of the name of the cached files
+VERSION = 2
+SHAPEFILE = ("data/external/ne_110m_admin_0_countries/"
+             "ne_110m_admin_0_countries.shp")
+
+# Attributes copied from the shapefile into each feature
+PROPERTIES = ["NAME", "ISO_A3_EH", "ADM0_A3"]
+
+
+class Topology:
+    """
+    A class that builds a quantized topology (shared arcs) from the world
+    countries shapefile. Borders shared by two countries are stored once, so
+    simplifying an arc simplifies both sides of the border in the same way
+    and no gaps or overlaps appear between neighbours.
+    """
+    def __init__(self, quantization: int = QUANTIZATION):
+        self.quantization = quantization
+        countries = load_countries()
+        countries = countries[countries["NAME"] != "Antarctica"]
+
+        self.properties = countries[PROPERTIES].reset_index(drop=True)
+        self.properties["Country"] = get_name_index().to_country(
+            countries["NAME"])
+        self.ids = self.properties["ADM0_A3"].to_list()
+
+        bounds = countries.total_bounds
+        self.translate = bounds[:2]
+        self.scale = (bounds[2:] - bounds[:2]) / (quantization - 1)
+
+        # Each geometry is a list of polygons, each polygon is a list of
+        # rings and each ring is an integer array of shape (n, 2)
+        self._geometries = [self._quantize(g) for g in countries.geometry]
+        self.arcs = []
+        self._geometry_arcs = self._build_arcs()
+        self._cache = {}
+
+    def _quantize(self, geometry) -> list:
+        """
+        Quantizes the rings of a (multi)polygon to the integer grid. Points
+        are snap-rounded (see `shapely.set_precision`), so that rings stay
+        valid when nearby vertices fall in the same grid cell.
+
+        Parameters
+        ----------
+        geometry : shapely.Geometry
+            The polygon or multipolygon.
+
+        Returns
+        -------
+        list
+            A list of polygons, each one a list of closed integer rings.
+        """
+        grid = shapely.set_precision(
+            shapely.transform(
+                geometry, lambda xy: (xy - self.translate) / self.scale),
+            1.0)
+        polygons = []
+        for polygon in shapely.get_parts(grid):
+            if not isinstance(polygon, shapely.Polygon):
+                continue
+            rings = [polygon.exterior] + list(polygon.interiors)
+            quantized = []
+            for ring in rings:
+                xy = np.round(shapely.get_coordinates(ring)).astype(np.int64)
+                keep = np.ones(len(xy), dtype=bool)
+                keep[1:] = np.any(np.diff(xy, axis=0) != 0, axis=1)
+                xy = xy[keep]
+                if len(xy) >= 4:
+                    quantized.append(xy)
+            if quantized:
+                polygons.append(quantized)
+        return polygons
+
+    def _find_junctions(self) -> np.ndarray:
+        """
+        Finds the junctions of the topology: the points where a ring meets a
+        different set of neighbouring points in different occurrences,
+        i.e. where shared borders start or end.
+
+        Returns
+        -------
+        np.ndarray
+            The point keys of the junctions.
+        """
+        rings = [ring for geometry in self._geometries
+                 for polygon in geometry for ring in polygon]
+        points, prev_points, next_points = [], [], []
+        for ring in rings:
+            keys = self._keys(ring[:-1])
+            points.append(keys)
+            prev_points.append(np.roll(keys, 1))
+            next_points.append(np.roll(keys, -1))
+        points = np.concatenate(points)
+        prev_points = np.concatenate(prev_points)
+        next_points = np.concatenate(next_points)
+
+        df = pd.DataFrame({
+            "Point": points,
+            "Low": np.minimum(prev_points, next_points),
+            "High": np.maximum(prev_points, next_points)})
+        n_neighbours = df.drop_duplicates().groupby("Point").size()
+        return n_neighbours.index[n_neighbours > 1].to_numpy()
+
+    def _keys(self, xy: np.ndarray) -> np.ndarray:
+        """
+        Encodes integer points as single integer keys.
+
+        Parameters
+        ----------
+        xy : np.ndarray
+            The points, with shape (n, 2).
+
+        Returns
+        -------
+        np.ndarray
+            The point keys.
+        """
+        return xy[:, 0] * self.quantization + xy[:, 1]
+
+    def _build_arcs(self) -> list:
+        """
+        Cuts every ring at its junctions and stores each distinct arc once.
+
+        Returns
+        -------
+        list
+            For each geometry, its polygons as lists of rings, each ring
+            being a list of arc references (a negative reference `~i` means
+            arc `i` reversed).
+        """
+        junctions = self._find_junctions()
+        lookup = {}
+
+        def add_arc(xy: np.ndarray) -> int:
+            key = tuple(self._keys(xy))
+            if key in lookup:
+                return lookup[key]
+            reverse_key = key[::-1]
+            if reverse_key in lookup:
+                return ~lookup[reverse_key]
+            self.arcs.append(xy)
+            lookup[key] = len(self.arcs) - 1
+            return lookup[key]
+
+        geometry_arcs = []
+        for geometry in self._geometries:
+            polygons = []
+            for polygon in geometry:
+                rings = []
+                for ring in polygon:
+                    points = ring[:-1]
+                    keys = self._keys(points)
+                    cuts = np.flatnonzero(np.isin(keys, junctions))
+                    if len(cuts) == 0:
+                        # Isolated ring: rotate it to start at its lowest
+                        # point so that shared rings (enclaves) match
+                        start = int(np.argmin(keys))
+                        rotated = np.roll(points, -start, axis=0)
+                        rotated = np.vstack([rotated, rotated[:1]])
+                        rings.append([add_arc(rotated)])
+                        continue
+                    rotated = np.roll(points, -cuts[0], axis=0)
+                    rotated = np.vstack([rotated, rotated[:1]])
+                    cuts = np.append(cuts - cuts[0], len(points))
+                    rings.append([add_arc(rotated[a:b + 1])
+                                  for a, b in zip(cuts[:-1], cuts[1:])])
+                polygons.append(rings)
+            geometry_arcs.append(polygons)
+        return geometry_arcs
+
+    def simplified_arcs(self, tolerance: float) -> list:
+        """
+        Simplifies every arc with the Douglas-Peucker algorithm, keeping its
+        end points fixed. Simplifying arcs one by one can make a ring
+        collapse or cross itself or another ring, so the arcs of every
+        polygon (or, if the parts of a geometry overlap, of every geometry)
+        that becomes invalid are restored to full detail. Results are
+        cached for each tolerance.
+
+        Parameters
+        ----------
+        tolerance : float
+            The tolerance, in degrees.
+
+        Returns
+        -------
+        list
+            The simplified arcs, as integer arrays.
+
+        Raises
+        ------
+        ValueError
+            If some geometry is invalid even at full detail.
+        """
+        if tolerance in self._cache:
+            return self._cache[tolerance]
+        arcs = list(self.arcs)
+        if tolerance > 0:
+            grid_tolerance = tolerance / self.scale.min()
+            for i, arc in enumerate(self.arcs):
+                line = shapely.simplify(shapely.linestrings(arc),
+                                        grid_tolerance)
+                xy = shapely.get_coordinates(line).astype(np.int64)
+                closed = np.array_equal(arc[0], arc[-1])
+                if not (closed and len(xy) < 4):
+                    arcs[i] = xy
+
+        while True:
+            invalid = self._find_invalid(arcs)
+            restore = {a for refs in invalid.values() for a in refs
+                       if arcs[a] is not self.arcs[a]}
+            if not restore:
+                break
+            for a in restore:
+                arcs[a] = self.arcs[a]
+        if invalid:
+            names = self.properties["NAME"].iloc[list(invalid)].to_list()
+            raise ValueError(f"Invalid geometries: {', '.join(names)}.")
+        self._cache[tolerance] = arcs
+        return arcs
+
+    def _find_invalid(self, arcs: list) -> dict:
+        """
+        Finds the invalid geometries for a set of arcs: those with a ring of
+        fewer than 4 points or that are not valid (see `shapely.is_valid`).
+
+        Parameters
+        ----------
+        arcs : list
+            The arcs of the topology.
+
+        Returns
+        -------
+        dict
+            The arcs to restore, as sets of arc indices, keyed by the
+            number of each invalid geometry.
+        """
+        invalid = {}
+        for i, polygons in enumerate(self._geometry_arcs):
+            shapes, bad = [], set()
+            for rings in polygons:
+                refs = {ref if ref >= 0 else ~ref
+                        for ring in rings for ref in ring}
+                xy = [self._decode_ring(arcs, ring) for ring in rings]
+                if min(len(ring) for ring in xy) < 4:
+                    bad |= refs
+                    continue
+                polygon = shapely.Polygon(xy[0], xy[1:])
+                if not shapely.is_valid(polygon):
+                    bad |= refs
+                shapes.append(polygon)
+            if not bad and not shapely.is_valid(shapely.multipolygons(shapes)):
+                bad = {ref if ref >= 0 else ~ref for rings in polygons
+                       for ring in rings for ref in ring}
+            if bad:
+                invalid[i] = bad
+        return invalid
+
+    def to_topojson(self, tolerance: float = 0.0) -> dict:
+        """
+        Returns the topology as a quantized TopoJSON dictionary.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            The simplification tolerance, in degrees. By default 0 (no
+            simplification).
+
+        Returns
+        -------
+        dict
+            The TopoJSON topology.
+        """
+        arcs = [np.vstack([arc[:1], np.diff(arc, axis=0)]).tolist()
+                for arc in self.simplified_arcs(tolerance)]
+        geometries = []
+        for i, polygons in enumerate(self._geometry_arcs):
+            geometries.append({
+                "type": "MultiPolygon",
+                "id": self.ids[i],
+                "properties": self._feature_properties(i),
+                "arcs": polygons})
+        return {
+            "type": "Topology",
+            "transform": {"scale": self.scale.tolist(),
+                          "translate": self.translate.tolist()},
+            "objects": {"countries": {"type": "GeometryCollection",
+                                      "geometries": geometries}},
+            "arcs": arcs}
+
+    def to_geojson(self, tolerance: float = 0.0,
+                   precision: int = 4) -> dict:
+        """
+        Returns the topology as a GeoJSON feature collection.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            The simplification tolerance, in degrees. By default 0 (no
+            simplification).
+        precision : int, optional
+            The number of decimals of the coordinates. By default 4.
+
+        Returns
+        -------
+        dict
+            The GeoJSON feature collection.
+        """
+        arcs = self.simplified_arcs(tolerance)
+        features = []
+        for i, polygons in enumerate(self._geometry_arcs):
+            coordinates = []
+            for rings in polygons:
+                coordinates.append([
+                    np.round(self._decode_ring(arcs, refs) * self.scale
+                             + self.translate, precision).tolist()
+                    for refs in rings])
+            features.append({
+                "type": "Feature",
+                "id": self.ids[i],
+                "properties": self._feature_properties(i),
+                "geometry": {"type": "MultiPolygon",
+                             "coordinates": coordinates}})
+        return {"type": "FeatureCollection", "features": features}
+
+    def to_geometries(self, tolerance: float = 0.0) -> np.ndarray:
+        """
+        Returns the geometries of the topology as shapely multipolygons, in
+        degrees and in the order of `self.properties`.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            The simplification tolerance, in degrees. By default 0 (no
+            simplification).
+
+        Returns
+        -------
+        np.ndarray
+            The geometries.
+        """
+        arcs = self.simplified_arcs(tolerance)
+        geometries = []
+        for polygons in self._geometry_arcs:
+            parts = []
+            for rings in polygons:
+                xy = [self._decode_ring(arcs, refs) * self.scale
+                      + self.translate for refs in rings]
+                parts.append(shapely.Polygon(xy[0], xy[1:]))
+            geometries.append(shapely.MultiPolygon(parts))
+        return np.array(geometries, dtype=object)
+
+    @staticmethod
+    def _decode_ring(arcs: list, refs: list) -> np.ndarray:
+        """
+        Joins the arcs of a ring into a closed array of points.
+
+        Parameters
+        ----------
+        arcs : list
+            The arcs of the topology.
+        refs : list
+            The arc references of the ring.
+
+        Returns
+        -------
+        np.ndarray
+            The ring points, with shape (n, 2).
+        """
+        parts = []
+        for k, ref in enumerate(refs):
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            parts.append(arc if k == 0 else arc[1:])
+        return np.vstack(parts)
+
+    def _feature_properties(self, i: int) -> dict:
+        """
+        Returns the properties of the i-th feature, with missing values
+        replaced by None.
+
+        Parameters
+        ----------
+        i : int
+            The feature number.
+
+        Returns
+        -------
+        dict
+            The feature properties.
+        """
+        row = self.properties.iloc[i]
+        return {k: (v if isinstance(v, str) else None)
+                for k, v in row.items()}
+
+
+@lru_cache(maxsize=None)
+def get_topology() -> Topology:
+    """
+    Returns the topology of the world countries, built once per session.
+
+    Returns
+    -------
+    Topology
+        The topology.
+    """
+    return Topology()
+
+
+def _cached_json(path: str, build) -> dict:
+    """
+    Loads a JSON document from the disk cache, building and storing it first
+    if it is missing or older than the shapefile.
+
+    Parameters
+    ----------
+    path : str
+        The path of the cached file.
+    build : callable
+        A function that returns the document.
+
+    Returns
+    -------
+    dict
+        The document.
+    """
+    if os.path.exists(path) \
+            and os.path.getmtime(path) >= os.path.getmtime(SHAPEFILE):
+        with open(path) as f:
+            return json.load(f)
+    document = build()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, separators=(",", ":"))
+    return document
+
+
+@lru_cache(maxsize=None)
+def get_topojson(detail: str = "medium") -> dict:
+    """
+    Returns the quantized TopoJSON of the world countries at the given level
+    of detail (see `DETAIL_LEVELS`).
+
+    Parameters
+    ----------
+    detail : str, optional
+        The level of detail. By default "medium".
+
+    Returns
+    -------
+    dict
+        The TopoJSON topology.
+    """
+    tolerance = DETAIL_LEVELS[detail]
+    return _cached_json(
+        f"{CACHE_DIR}/countries_v{VERSION}_t{tolerance:g}"
+        f"_q{QUANTIZATION}.topojson",
+        lambda: get_topology().to_topojson(tolerance))
+
+
+@lru_cache(maxsize=None)
+def get_geojson(detail: str = "medium") -> dict:
+    """
+    Returns the GeoJSON of the world countries at the given level of detail
+    (see `DETAIL_LEVELS`). Features are identified by their `ADM0_A3` code,
+    which can be used with `featureidkey="id"` in Plotly maps.
+
+    Parameters
+    ----------
+    detail : str, optional
+        The level of detail. By default "medium".
+
+    Returns
+    -------
+    dict
+        The GeoJSON feature collection.
+    """
+    tolerance = DETAIL_LEVELS[detail]
+    return _cached_json(
+        f"{CACHE_DIR}/countries_v{VERSION}_t{tolerance:g}"
+        f"_q{QUANTIZATION}.geojson",
+        lambda: get_topology().to_geojson(tolerance))
+
+
+if __name__ == "__main__":
+    for detail in DETAIL_LEVELS:
+        topojson = json.dumps(get_topojson(detail), separators=(",", ":"))
+        geojson = json.dumps(get_geojson(detail), separators=(",", ":"))
+        print(f"{detail}: TopoJSON {len(topojson) / 1024:.0f} kB, "
+              f"GeoJSON {len(geojson) / 1024:.0f} kB")
@@ -0,0 +1,369 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data import Data, get_name_index
+from names import NameIndex
+
+
+DEFAULT_SOURCES = "data/external/indicators.json"
+
+# Functions that read a local file into a long table with the columns
+# `Country`, `Year` and `Value`, by format name (see `register_reader`)
+READERS = {}
+
+
+def register_reader(name: str):
+    """
+    Returns a decorator that registers a function as the reader of a file
+    format. A reader takes the path of the file and keyword options and
+    returns a table with the columns `Country`, `Year` and `Value`, where
+    `Country` may hold country names or ISO codes.
+
+    Parameters
+    ----------
+    name : str
+        The name of the format.
+
+    Returns
+    -------
+    callable
+        The decorator.
+    """
+    def decorator(reader):
+        READERS[name] = reader
+        return reader
+    return decorator
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    """
+    Reads a CSV, JSON or Parquet file, depending on its extension.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    pd.DataFrame
+        The table.
+    """
+    if path.endswith(".json"):
+        return pd.read_json(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+@register_reader("long")
+def read_long(path: str, country: str = "Country", year: str = "Year",
+              value: str = "Value") -> pd.DataFrame:
+    """
+    Reads a file with one row per country and year.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    country : str, optional
+        The column of the country names or ISO codes. By default "Country".
+    year : str, optional
+        The column of the years. By default "Year".
+    value : str, optional
+        The column of the values. By default "Value".
+
+    Returns
+    -------
+    pd.DataFrame
+        The table, with the columns `Country`, `Year` and `Value`.
+    """
+    df = _read_table(path)
+    return pd.DataFrame({"Country": df[country], "Year": df[year],
+                         "Value": df[value]})
+
+
+@register_reader("wide")
+def read_wide(path: str, country: str = "Country") -> pd.DataFrame:
+    """
+    Reads a file with one row per country and one column per year (the
+    columns whose names are years), like the democracy index table.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    country : str, optional
+        The column of the country names or ISO codes. By default "Country".
+
+    Returns
+    -------
+    pd.DataFrame
+        The table, with the columns `Country`, `Year` and `Value`.
+    """
+    df = _read_table(path)
+    years = [c for c in df.columns if str(c).isdigit()]
+    df = df.melt(id_vars=[country], value_vars=years, var_name="Year",
+                 value_name="Value")
+    return df.rename(columns={country: "Country"})
+
+
+class IndicatorStore:
+    """
+    A columnar store of country-year indicators. Every indicator is a
+    (country, year) array over the same keys: the countries of the name
+    reconciliation index (see `names.NameIndex`) and the union of the years
+    of all indicators. Joins and correlations between indicators are then
+    operations between aligned arrays.
+    """
+    def __init__(self, name_index: NameIndex = None):
+        """
+        Parameters
+        ----------
+        name_index : NameIndex, optional
+            The index used to match the countries of every source. By
+            default the one of the democracy index data and the world
+            countries shapefile (see `data.get_name_index`).
+        """
+        self.name_index = get_name_index() if name_index is None \
+            else name_index
+        self.countries = self.name_index.countries
+        self.years = np.array([], dtype=np.int64)
+        self.indicators = {}
+        self.unmatched = {}
+
+    def _extend_years(self, years: np.ndarray) -> None:
+        """
+        Adds years to the key space, realigning the stored indicators.
+
+        Parameters
+        ----------
+        years : np.ndarray
+            The years.
+        """
+        new_years = np.union1d(self.years, years).astype(np.int64)
+        if len(new_years) == len(self.years):
+            return
+        positions = np.searchsorted(new_years, self.years)
+        for name, values in self.indicators.items():
+            extended = np.full((len(self.countries), len(new_years)), np.nan)
+            extended[:, positions] = values
+            self.indicators[name] = extended
+        self.years = new_years
+
+    def add(self, name: str, df: pd.DataFrame) -> None:
+        """
+        Adds an indicator from a long table. Countries are matched with the
+        name index; unmatched names are recorded in `self.unmatched` (with
+        None for missing names) and values repeated for a country and year
+        are averaged.
+
+        Parameters
+        ----------
+        name : str
+            The name of the indicator.
+        df : pd.DataFrame
+            A table with the columns `Country`, `Year` and `Value`.
+        """
+        # Missing country names are not looked up and count as unmatched
+        names = df["Country"]
+        present = names.notna().to_numpy()
+        codes = np.full(len(df), -1, dtype=np.int64)
+        codes[present] = self.name_index.lookup(
+            names[present].astype(str))
+        years = pd.to_numeric(df["Year"], errors="coerce").to_numpy()
+        values = pd.to_numeric(df["Value"], errors="coerce").to_numpy(
+            dtype=float)
+        unmatched = names[(codes < 0) & present].astype(str).unique()
+        self.unmatched[name] = sorted(unmatched) \
+            + ([None] if not present.all() else [])
+
+        keep = (codes >= 0) & ~np.isnan(years) & ~np.isnan(values)
+        codes, years, values = codes[keep], years[keep].astype(np.int64), \
+            values[keep]
+        self._extend_years(np.unique(years))
+        cells = codes * len(self.years) + np.searchsorted(self.years, years)
+
+        size = len(self.countries) * len(self.years)
+        sums = np.bincount(cells, values, minlength=size)
+        counts = np.bincount(cells, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.indicators[name] = np.where(
+                counts > 0, sums / counts, np.nan).reshape(
+                    len(self.countries), len(self.years))
+
+    def load(self, name: str, path: str, format: str = "long",
+             **options) -> None:
+        """
+        Loads an indicator from a local file.
+
+        Parameters
+        ----------
+        name : str
+            The name of the indicator.
+        path : str
+            The path of the file.
+        format : str, optional
+            The format of the file, a key of `READERS`. By default "long".
+        **options
+            Additional arguments for the reader.
+        """
+        if format not in READERS:
+            raise ValueError(f"Unknown format: {format}.")
+        self.add(name, READERS[format](path, **options))
+
+    def load_sources(self, path: str = DEFAULT_SOURCES) -> None:
+        """
+        Loads the indicators listed in a JSON file, as a list of objects
+        with the `name`, `path` and optional `format` of each source and
+        any reader option.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the file. By default
+            `data/external/indicators.json`.
+        """
+        with open(path, encoding="utf-8") as f:
+            sources = json.load(f)
+        for source in sources:
+            source = dict(source)
+            self.load(source.pop("name"), source.pop("path"), **source)
+
+    def get_panel(self, name: str) -> pd.DataFrame:
+        """
+        Returns an indicator as a table with one row per country and one
+        column per year.
+
+        Parameters
+        ----------
+        name : str
+            The name of the indicator.
+
+        Returns
+        -------
+        pd.DataFrame
+            The country-by-year table.
+        """
+        return pd.DataFrame(
+            self.indicators[name],
+            index=pd.Index(self.countries, name="Country"),
+            columns=pd.Index(self.years, name="Year"))
+
+    def join(self, names: list[str] = None,
+             how: str = "inner") -> pd.DataFrame:
+        """
+        Returns several indicators side by side, one row per country and
+        year, by flattening their aligned arrays.
+
+        Parameters
+        ----------
+        names : list[str], optional
+            The indicators. By default all of them.
+        how : str, optional
+            "inner" (the default) keeps the country-years where every
+            indicator has a value, "outer" those where any has one.
+
+        Returns
+        -------
+        pd.DataFrame
+            The table, with the columns `Country`, `Year` and one column
+            per indicator.
+        """
+        names = list(self.indicators) if names is None else names
+        values = np.stack([self.indicators[n].ravel() for n in names])
+        present = ~np.isnan(values)
+        keep = present.all(axis=0) if how == "inner" \
+            else present.any(axis=0)
+        rows, cols = np.divmod(np.flatnonzero(keep), len(self.years))
+        df = pd.DataFrame({"Country": self.countries[rows],
+                           "Year": self.years[cols]})
+        for name, column in zip(names, values[:, keep]):
+            df[name] = column
+        return df
+
+    def get_correlations(self, names: list[str] = None) -> pd.DataFrame:
+        """
+        Returns the Pearson correlation between every pair of indicators,
+        over the country-years where both have a value. All pairs are
+        computed at once with matrix products.
+
+        Parameters
+        ----------
+        names : list[str], optional
+            The indicators. By default all of them.
+
+        Returns
+        -------
+        pd.DataFrame
+            The correlation matrix.
+        """
+        names = list(self.indicators) if names is None else names
+        values = np.stack([self.indicators[n].ravel() for n in names])
+        mask = (~np.isnan(values)).astype(float)
+        x = np.where(mask > 0, values, 0.0)
+        n = mask @ mask.T
+        sum_a, sum_b = x @ mask.T, mask @ x.T
+        cov = n * (x @ x.T) - sum_a * sum_b
+        var_a = n * ((x ** 2) @ mask.T) - sum_a ** 2
+        var_b = n * (mask @ (x ** 2).T) - sum_b ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.sqrt(var_a * var_b)
+        corr = np.where(n > 1, corr, np.nan)
+        return pd.DataFrame(corr, index=names, columns=names)
+
+    def get_yearly_correlations(self, a: str, b: str) -> pd.Series:
+        """
+        Returns the correlation across countries between two indicators for
+        every year, over the countries where both have a value.
+
+        Parameters
+        ----------
+        a : str
+            The first indicator.
+        b : str
+            The second indicator.
+
+        Returns
+        -------
+        pd.Series
+            The correlation of each year.
+        """
+        x, y = self.indicators[a], self.indicators[b]
+        both = ~np.isnan(x) & ~np.isnan(y)
+        n = both.sum(axis=0)
+        x, y = np.where(both, x, 0.0), np.where(both, y, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_x, mean_y = x.sum(axis=0) / n, y.sum(axis=0) / n
+            dx = np.where(both, x - mean_x, 0.0)
+            dy = np.where(both, y - mean_y, 0.0)
+            corr = (dx * dy).sum(axis=0) / np.sqrt(
+                (dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+        return pd.Series(np.where(n > 1, corr, np.nan),
+                         index=pd.Index(self.years, name="Year"),
+                         name="Correlation")
+
+
+@lru_cache(maxsize=None)
+def get_indicator_store() -> IndicatorStore:
+    """
+    Returns the indicator store with the democracy index (as
+    `DemocracyIndex`) and the sources listed in
+    `data/external/indicators.json`, if that file exists. The store is built
+    once per session.
+
+    Returns
+    -------
+    IndicatorStore
+        The indicator store.
+    """
+    store = IndicatorStore()
+    df = Data().df
+    store.add("DemocracyIndex", df.rename(columns={"DemocracyIndex": "Value"}))
+    if os.path.exists(DEFAULT_SOURCES):
+        store.load_sources(DEFAULT_SOURCES)
+    return store
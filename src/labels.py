@@ -0,0 +1,115 @@
+import numpy as np
+
+
+def spread_labels(y: np.ndarray, min_gap: float, lower: float = -np.inf,
+                  upper: float = np.inf) -> np.ndarray:
+    """
+    Moves label positions along one axis as little as possible so that
+    consecutive labels are at least `min_gap` apart and all of them lie
+    within the given bounds.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        The preferred positions.
+    min_gap : float
+        The minimum distance between two labels.
+    lower : float, optional
+        The lowest allowed position. By default there is no limit.
+    upper : float, optional
+        The highest allowed position. By default there is no limit.
+
+    Returns
+    -------
+    np.ndarray
+        The new positions, in the same order as `y`.
+    """
+    y = np.asarray(y, dtype=float)
+    order = np.argsort(y, kind="stable")
+    steps = min_gap * np.arange(len(y))
+
+    # Push labels up from the bottom, then down from the top
+    spread = np.maximum.accumulate(np.maximum(y[order], lower) - steps) \
+        + steps
+    spread = np.minimum(spread, upper - steps[::-1])
+    spread = np.minimum.accumulate((spread - steps)[::-1])[::-1] + steps
+
+    result = np.empty_like(y)
+    result[order] = spread
+    return result
+
+
+def place_series_labels(x: np.ndarray, values: np.ndarray, labels: list[str],
+                        char_width: float, height: float,
+                        x_range: tuple = None,
+                        y_range: tuple = None) -> list[tuple]:
+    """
+    Places one label next to each line of a time-series chart, choosing,
+    for each label in turn, the position along its line (above or below it)
+    that is farthest from every line and from the labels already placed.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The x values shared by all lines, with shape (n_x,).
+    values : np.ndarray
+        The y values of each line, with shape (n_lines, n_x).
+    labels : list[str]
+        The text of each label.
+    char_width : float
+        The approximate width of one character, in x units.
+    height : float
+        The approximate height of a label, in y units.
+    x_range : tuple, optional
+        The visible x range. By default the range of `x`.
+    y_range : tuple, optional
+        The visible y range. By default the range of `values`.
+
+    Returns
+    -------
+    list[tuple]
+        The (x, y) position of the center of each label.
+    """
+    x = np.asarray(x, dtype=float)
+    values = np.asarray(values, dtype=float)
+    x_range = x_range or (x.min(), x.max())
+    y_range = y_range or (np.nanmin(values), np.nanmax(values))
+    n_samples = 7
+
+    placed = []
+    for i, label in enumerate(labels):
+        width = char_width * len(label)
+        cand_x = np.clip(x, x_range[0] + width / 2, x_range[1] - width / 2)
+        offset = height / 2 + 0.1 * height
+        cand_x = np.concatenate([cand_x, cand_x])
+        cand_y = np.concatenate([
+            np.interp(cand_x[:len(x)], x, values[i]) + offset,
+            np.interp(cand_x[:len(x)], x, values[i]) - offset])
+
+        # Distance from each candidate box to every line, sampled along the
+        # width of the box
+        samples = cand_x[:, None] + width * np.linspace(-0.5, 0.5,
+                                                        n_samples)[None, :]
+        clearance = np.full(len(cand_x), np.inf)
+        for j, line in enumerate(values):
+            line_y = np.interp(samples, x, line)
+            gap = np.abs(line_y - cand_y[:, None]).min(axis=1) - height / 2
+            if j == i:
+                # The label sits right next to its own line, which only
+                # matters if it crosses the label
+                gap = np.where(gap < 0, gap, np.inf)
+            clearance = np.minimum(clearance, gap)
+
+        # Distance to the labels already placed
+        for (px, py, pw) in placed:
+            dx = np.abs(cand_x - px) - (width + pw) / 2
+            dy = np.abs(cand_y - py) - height
+            clearance = np.minimum(clearance, np.maximum(dx, dy))
+
+        inside = (cand_y - height / 2 >= y_range[0]) \
+            & (cand_y + height / 2 <= y_range[1])
+        clearance[~inside] = -np.inf
+        best = int(np.argmax(clearance))
+        placed.append((cand_x[best], cand_y[best], width))
+
+    return [(float(px), float(py)) for px, py, _ in placed]
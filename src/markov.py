@@ -0,0 +1,269 @@
+import numpy as np
+import pandas as pd
+
+from data import Data, REGIME_TYPES, assign_regime_codes
+
+
+def normalize_rows(counts: np.ndarray) -> np.ndarray:
+    """
+    Normalizes the rows of one or more count matrices so that they add up to
+    one. Rows without counts are replaced by the corresponding row of the
+    identity matrix (the regime is assumed to persist).
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        The count matrices, with shape (..., n, n).
+
+    Returns
+    -------
+    np.ndarray
+        The transition matrices, with the same shape.
+    """
+    counts = np.asarray(counts, dtype=float)
+    totals = counts.sum(axis=-1, keepdims=True)
+    identity = np.broadcast_to(np.eye(counts.shape[-1]), counts.shape)
+    return np.where(totals > 0, counts / np.where(totals > 0, totals, 1),
+                    identity)
+
+
+def matrix_powers(matrix: np.ndarray, steps) -> np.ndarray:
+    """
+    Computes several powers of a square matrix at once through its
+    eigendecomposition, falling back to repeated squaring if the matrix is
+    not diagonalizable.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        The matrix, with shape (n, n).
+    steps : array-like
+        The (non-negative integer) exponents.
+
+    Returns
+    -------
+    np.ndarray
+        The powers, with shape (len(steps), n, n).
+    """
+    steps = np.atleast_1d(np.asarray(steps, dtype=int))
+    eigenvalues, eigenvectors = np.linalg.eig(matrix)
+    if np.linalg.cond(eigenvectors) < 1e8:
+        inverse = np.linalg.inv(eigenvectors)
+        scaled = eigenvalues[None, :] ** steps[:, None]
+        powers = np.einsum("ij,kj,jl->kil", eigenvectors, scaled, inverse)
+        return powers.real
+    return np.stack([np.linalg.matrix_power(matrix, k) for k in steps])
+
+
+def stationary_distribution(matrices: np.ndarray) -> np.ndarray:
+    """
+    Returns the stationary distribution of one or more transition matrices,
+    i.e. the left eigenvector with eigenvalue one, normalized to add up to
+    one. The distribution is not unique if the chain is reducible (more
+    than one eigenvalue equals one); NaNs are returned in that case.
+
+    Parameters
+    ----------
+    matrices : np.ndarray
+        The transition matrices, with shape (..., n, n).
+
+    Returns
+    -------
+    np.ndarray
+        The stationary distributions, with shape (..., n).
+    """
+    eigenvalues, eigenvectors = np.linalg.eig(np.swapaxes(matrices, -1, -2))
+    unit = np.abs(eigenvalues - 1) < 1e-9
+    idx = np.argmin(np.abs(eigenvalues - 1), axis=-1)
+    vectors = np.take_along_axis(
+        eigenvectors, idx[..., None, None], axis=-1)[..., 0].real
+    vectors = vectors / vectors.sum(axis=-1, keepdims=True)
+    unique = unit.sum(axis=-1, keepdims=True) == 1
+    return np.where(unique, np.clip(vectors, 0, None), np.nan)
+
+
+class RegimeTransitionModel:
+    """
+    A class that models regime types as a Markov chain. Transitions are
+    counted between every pair of consecutive editions of the index (the
+    editions are not always one year apart, e.g. 2006 to 2008), so one step
+    of the chain is one edition.
+    """
+    def __init__(self, data: Data = None, regions: list[str] = None):
+        """
+        Parameters
+        ----------
+        data : Data, optional
+            The data to use. By default a new `Data` instance is created.
+        regions : list[str], optional
+            If given, only the countries in these regions are used.
+        """
+        data = Data() if data is None else data
+        df = data.df if regions is None else data.filter_by_region(regions)
+        panel = df.pivot(index="Country", columns="Year",
+                         values="DemocracyIndex")
+
+        self.regimes = REGIME_TYPES
+        self.countries = panel.index.to_numpy()
+        self.years = panel.columns.to_numpy()
+        self.states = assign_regime_codes(panel.to_numpy())
+
+        # Transition counts per country, with shape (n_countries, n, n)
+        n = len(self.regimes)
+        start, end = self.states[:, :-1], self.states[:, 1:]
+        valid = (start >= 0) & (end >= 0)
+        rows = np.broadcast_to(np.arange(len(self.countries))[:, None],
+                               start.shape)
+        flat = rows[valid] * n * n + start[valid] * n + end[valid]
+        self.country_counts = np.bincount(
+            flat, minlength=len(self.countries) * n * n).reshape(
+                len(self.countries), n, n)
+
+        self.counts = self.country_counts.sum(axis=0)
+        self.matrix = normalize_rows(self.counts)
+
+    def get_transition_matrix(self) -> pd.DataFrame:
+        """
+        Returns the transition matrix, with the starting regime types as
+        rows and the ending regime types as columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            The transition matrix.
+        """
+        return pd.DataFrame(self.matrix, index=self.regimes,
+                            columns=self.regimes)
+
+    def get_distribution(self, year: int = None) -> np.ndarray:
+        """
+        Returns the observed share of countries in each regime type.
+
+        Parameters
+        ----------
+        year : int, optional
+            The year. By default the last year in the data.
+
+        Returns
+        -------
+        np.ndarray
+            The regime type distribution.
+
+        Raises
+        ------
+        KeyError
+            If there is no data for the year.
+        """
+        if year is None:
+            j = -1
+        else:
+            columns = np.flatnonzero(self.years == year)
+            if len(columns) == 0:
+                raise KeyError(f"No data for year {year}.")
+            j = int(columns[0])
+        states = self.states[:, j]
+        counts = np.bincount(states[states >= 0],
+                             minlength=len(self.regimes))
+        return counts / counts.sum()
+
+    def project(self, steps, distribution: np.ndarray = None) -> np.ndarray:
+        """
+        Projects a regime type distribution several steps ahead.
+
+        Parameters
+        ----------
+        steps : int or array-like
+            The number of steps (editions) to project. An array of steps is
+            projected in a single batched operation.
+        distribution : np.ndarray, optional
+            The initial distribution. By default the distribution observed in
+            the last year.
+
+        Returns
+        -------
+        np.ndarray
+            The projected distributions, with shape (len(steps), n_regimes).
+        """
+        if distribution is None:
+            distribution = self.get_distribution()
+        return np.einsum("i,kij->kj", distribution,
+                         matrix_powers(self.matrix, steps))
+
+    def get_stationary_distribution(self) -> np.ndarray:
+        """
+        Returns the long-run (stationary) regime type distribution. If the
+        chain is reducible (e.g. a region where some regime type is never
+        left or never reached), the stationary distribution is not unique
+        and the long-run projection of the observed distribution is
+        returned instead.
+
+        Returns
+        -------
+        np.ndarray
+            The stationary distribution.
+        """
+        distribution = stationary_distribution(self.matrix)
+        if np.isnan(distribution).any():
+            distribution = self.project(10_000)[0]
+        return distribution
+
+    def bootstrap(self, n_resamples: int = 5000, confidence: float = 0.95,
+                  seed: int = None) -> dict:
+        """
+        Estimates confidence intervals for the transition matrix and the
+        stationary distribution by resampling countries with replacement.
+        All resamples are drawn and evaluated in batched array operations.
+
+        Parameters
+        ----------
+        n_resamples : int, optional
+            The number of bootstrap resamples. By default 5000.
+        confidence : float, optional
+            The confidence level of the intervals. By default 0.95.
+        seed : int, optional
+            The seed of the random number generator.
+
+        Returns
+        -------
+        dict
+            A dictionary with the lower and upper bounds of the transition
+            matrix (`matrix_low`, `matrix_high`) and of the stationary
+            distribution (`stationary_low`, `stationary_high`). Resamples
+            with a reducible chain are left out of the latter.
+        """
+        rng = np.random.default_rng(seed)
+        n_countries = len(self.countries)
+        weights = rng.multinomial(
+            n_countries, np.full(n_countries, 1 / n_countries),
+            size=n_resamples)
+        counts = np.einsum("bc,cij->bij", weights, self.country_counts)
+        matrices = normalize_rows(counts)
+        stationary = stationary_distribution(matrices)
+
+        alpha = (1 - confidence) / 2
+        matrix_low, matrix_high = np.quantile(
+            matrices, [alpha, 1 - alpha], axis=0)
+        stationary_low, stationary_high = np.nanquantile(
+            stationary, [alpha, 1 - alpha], axis=0)
+        return {"matrix_low": matrix_low, "matrix_high": matrix_high,
+                "stationary_low": stationary_low,
+                "stationary_high": stationary_high}
+
+
+def get_region_models(data: Data = None) -> dict:
+    """
+    Returns a regime transition model for each region.
+
+    Parameters
+    ----------
+    data : Data, optional
+        The data to use. By default a new `Data` instance is created.
+
+    Returns
+    -------
+    dict
+        The models, keyed by region.
+    """
+    data = Data() if data is None else data
+    return {region: RegimeTransitionModel(data, regions=[region])
+            for region in data.df["Region"].cat.categories}
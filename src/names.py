@@ -0,0 +1,336 @@
+import difflib
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+# Known aliases, keyed by the name used in external sources and valued with
+# the name used in the democracy index data. Territories without an entry of
+# their own in the index are mapped to the country that administers them.
+ALIASES = {
+    "Bosnia and Herz.": "Bosnia and Herzegovina",
+    "Côte d'Ivoire": "Ivory Coast",
+    "Cote d'Ivoire": "Ivory Coast",
+    "United States of America": "United States",
+    "USA": "United States",
+    "Central African Rep.": "Central African Republic",
+    "Eq. Guinea": "Equatorial Guinea",
+    "Congo": "Republic of the Congo",
+    "Congo, Rep.": "Republic of the Congo",
+    "Congo-Brazzaville": "Republic of the Congo",
+    "Dem. Rep. Congo": "Democratic Republic of the Congo",
+    "Congo, Dem. Rep.": "Democratic Republic of the Congo",
+    "DR Congo": "Democratic Republic of the Congo",
+    "Congo-Kinshasa": "Democratic Republic of the Congo",
+    "eSwatini": "Eswatini",
+    "Swaziland": "Eswatini",
+    "Czechia": "Czech Republic",
+    "Dominican Rep.": "Dominican Republic",
+    "East Timor": "Timor-Leste",
+    "Cabo Verde": "Cape Verde",
+    "Türkiye": "Turkey",
+    "Burma": "Myanmar",
+    "Macedonia": "North Macedonia",
+    "Russian Federation": "Russia",
+    "Korea, Rep.": "South Korea",
+    "Republic of Korea": "South Korea",
+    "Korea, Dem. People's Rep.": "North Korea",
+    "Lao PDR": "Laos",
+    "Hong Kong SAR, China": "Hong Kong",
+    "Greenland": "Denmark",
+    "Falkland Is.": "Argentina",
+}
+
+
+def strip_soft_hyphens(text: str) -> str:
+    """
+    Removes the soft hyphens (U+00AD) that Wikipedia inserts in long words,
+    e.g. "Asia and Austral\\xadasia".
+
+    Parameters
+    ----------
+    text : str
+        The text to clean.
+
+    Returns
+    -------
+    str
+        The text without soft hyphens.
+    """
+    return text.replace("\xad", "")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a country name for comparison: removes soft hyphens and
+    diacritics, lowercases it, replaces "&" with "and" and collapses
+    punctuation and whitespace into single spaces.
+
+    Parameters
+    ----------
+    name : str
+        The name to normalize.
+
+    Returns
+    -------
+    str
+        The normalized name.
+    """
+    name = unicodedata.normalize("NFKD", strip_soft_hyphens(name))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = name.casefold().replace("&", " and ")
+    return re.sub(r"[^0-9a-z]+", " ", name).strip()
+
+
+def slugify(text: str) -> str:
+    """
+    Converts a text into a file name made of lowercase letters, digits and
+    underscores (see `normalize_name`).
+
+    Parameters
+    ----------
+    text : str
+        The text.
+
+    Returns
+    -------
+    str
+        The file name.
+    """
+    return normalize_name(text).replace(" ", "_")
+
+
+class NameIndex:
+    """
+    A precomputed index that reconciles country names and ISO codes from
+    external sources with the countries of the democracy index data. Each
+    country is identified by an integer code (its position in
+    `self.countries`) and unmatched names get the code -1.
+    """
+    def __init__(self, countries: list[str], geo: pd.DataFrame = None,
+                 fuzzy_cutoff: float = 0.9):
+        """
+        Parameters
+        ----------
+        countries : list[str]
+            The country names used in the democracy index data.
+        geo : pd.DataFrame, optional
+            A table with the Natural Earth attributes (`NAME`, `NAME_LONG`,
+            `ADMIN` and the ISO columns). If given, the ISO codes of every
+            resolved row are added to the index.
+        fuzzy_cutoff : float, optional
+            The minimum similarity ratio, between 0 and 1, accepted by the
+            fuzzy fallback. By default 0.9.
+        """
+        self.countries = np.array(sorted(set(countries)), dtype=object)
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        self._exact = {c: i for i, c in enumerate(self.countries)}
+        self._normalized = {
+            normalize_name(c): i for i, c in enumerate(self.countries)}
+        self._aliases = {}
+        for alias, country in ALIASES.items():
+            if country in self._exact:
+                self._aliases[normalize_name(alias)] = self._exact[country]
+        self._iso = {}
+        self._cache = {}
+
+        if geo is not None:
+            self._add_iso_codes(geo)
+
+    def _add_iso_codes(self, geo: pd.DataFrame) -> None:
+        """
+        Resolves each row of the Natural Earth table from its name columns
+        and registers its ISO codes under the resulting country.
+
+        Parameters
+        ----------
+        geo : pd.DataFrame
+            The Natural Earth attribute table.
+        """
+        name_cols = [c for c in ["NAME", "NAME_LONG", "ADMIN"]
+                     if c in geo.columns]
+        iso_cols = [c for c in ["ISO_A3_EH", "ISO_A3", "ADM0_A3"]
+                    if c in geo.columns]
+        for _, row in geo[name_cols + iso_cols].iterrows():
+            code = -1
+            for col in name_cols:
+                code, _, _ = self._resolve(row[col], fuzzy=False)
+                if code >= 0:
+                    break
+            if code < 0:
+                continue
+            for col in iso_cols:
+                iso = row[col]
+                if isinstance(iso, str) and re.fullmatch(r"[A-Z]{3}", iso):
+                    self._iso.setdefault(iso, code)
+
+    def _resolve(self, name: str, fuzzy: bool = True) -> tuple:
+        """
+        Resolves a single name.
+
+        Parameters
+        ----------
+        name : str
+            The name (or ISO alpha-3 code) to resolve.
+        fuzzy : bool, optional
+            Whether to use the fuzzy fallback. By default True.
+
+        Returns
+        -------
+        tuple
+            The country code, the method used and the similarity score.
+        """
+        if not isinstance(name, str):
+            return -1, "unmatched", 0.0
+        if name in self._exact:
+            return self._exact[name], "exact", 1.0
+        if name in self._iso:
+            return self._iso[name], "iso", 1.0
+        key = normalize_name(name)
+        if key in self._aliases:
+            return self._aliases[key], "alias", 1.0
+        if key in self._normalized:
+            return self._normalized[key], "normalized", 1.0
+        if not fuzzy:
+            return -1, "unmatched", 0.0
+        if key in self._cache:
+            return self._cache[key]
+
+        candidates = list(self._normalized) + list(self._aliases)
+        matches = difflib.get_close_matches(
+            key, candidates, n=1, cutoff=self.fuzzy_cutoff)
+        result = -1, "unmatched", 0.0
+        if matches:
+            match = matches[0]
+            score = difflib.SequenceMatcher(None, key, match).ratio()
+            code = self._normalized.get(match, self._aliases.get(match))
+            result = code, "fuzzy", score
+        self._cache[key] = result
+        return result
+
+    def lookup(self, names) -> np.ndarray:
+        """
+        Returns the country codes for an array of names or ISO codes. Each
+        distinct name is resolved once and the codes are then broadcast back
+        to the input positions.
+
+        Parameters
+        ----------
+        names : array-like
+            The names to look up.
+
+        Returns
+        -------
+        np.ndarray
+            The country codes, with -1 for unmatched names.
+        """
+        inverse, uniques = pd.factorize(pd.Series(names, dtype=object))
+        codes = np.array([self._resolve(n)[0] for n in uniques] + [-1],
+                         dtype=np.int64)
+        return codes[inverse]
+
+    def to_country(self, names) -> np.ndarray:
+        """
+        Returns the democracy index country names for an array of names or
+        ISO codes.
+
+        Parameters
+        ----------
+        names : array-like
+            The names to look up.
+
+        Returns
+        -------
+        np.ndarray
+            The country names, with None for unmatched names.
+        """
+        codes = self.lookup(names)
+        countries = np.append(self.countries, None)
+        return countries[codes]
+
+    def coverage_report(self, names) -> pd.DataFrame:
+        """
+        Returns a report of how each distinct name was resolved, together
+        with the countries of the index that no name matched.
+
+        Parameters
+        ----------
+        names : array-like
+            The names to report on.
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame with the columns `Name`, `Country`, `Method` and
+            `Score`. Countries not covered by any name have `Method` set to
+            "missing".
+        """
+        uniques = pd.unique(pd.Series(names, dtype=object).dropna())
+        rows = []
+        covered = set()
+        for name in uniques:
+            code, method, score = self._resolve(name)
+            country = self.countries[code] if code >= 0 else None
+            covered.add(code)
+            rows.append((name, country, method, score))
+        for code, country in enumerate(self.countries):
+            if code not in covered:
+                rows.append((None, country, "missing", 0.0))
+        return pd.DataFrame(rows,
+                            columns=["Name", "Country", "Method", "Score"])
+
+
+def take_join(left: pd.DataFrame, left_codes: np.ndarray,
+              right: pd.DataFrame, right_codes: np.ndarray) -> pd.DataFrame:
+    """
+    Left-joins two DataFrames on precomputed integer codes. The rows of
+    `left` are kept in order, each one repeated once per matching row of
+    `right` (or once with missing values if there is no match).
+
+    Parameters
+    ----------
+    left : pd.DataFrame
+        The left DataFrame.
+    left_codes : np.ndarray
+        The codes of the rows of `left`, with -1 for unmatched rows.
+    right : pd.DataFrame
+        The right DataFrame.
+    right_codes : np.ndarray
+        The codes of the rows of `right`, with -1 for unmatched rows (which
+        are dropped).
+
+    Returns
+    -------
+    pd.DataFrame
+        The joined DataFrame.
+    """
+    left_codes = np.asarray(left_codes, dtype=np.int64)
+    right_codes = np.asarray(right_codes, dtype=np.int64)
+    right_rows = np.flatnonzero(right_codes >= 0)
+    right_codes = right_codes[right_rows]
+    n_codes = max(left_codes.max(initial=-1), right_codes.max(initial=-1)) + 1
+
+    order = right_rows[np.argsort(right_codes, kind="stable")]
+    counts = np.bincount(right_codes, minlength=n_codes)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    matched = left_codes >= 0
+    n_matches = np.where(matched, counts[np.where(matched, left_codes, 0)], 0)
+    reps = np.maximum(n_matches, 1)
+    left_idx = np.repeat(np.arange(len(left)), reps)
+    within = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+    has_match = n_matches[left_idx] > 0
+    right_pos = offsets[np.where(has_match, left_codes[left_idx], 0)] + within
+    right_idx = np.where(has_match, order[np.where(has_match, right_pos, 0)],
+                         -1)
+
+    left_part = left.iloc[left_idx].reset_index(drop=True)
+    right_part = right.iloc[np.maximum(right_idx, 0)].reset_index(drop=True)
+    right_part = right_part.where(pd.Series(has_match), other=np.nan)
+    columns = [c for c in right_part.columns if c not in left_part.columns]
+    for column in columns:
+        left_part[column] = right_part[column]
+    return left_part
@@ -1,6 +1,12 @@
+import os
+import threading
+
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.graph_objects import Figure
+from plotly.subplots import make_subplots
 import numpy as np
+import pandas as pd
 import matplotlib as mpl
 import matplotlib.colors as mcolors
 
@@ -8,19 +14,53 @@ from colors import Colors
 from data import Data, get_yearly_geographic_data
 from data import get_index_change_geographic_data, get_migration_matrix
 from config import Config
+from geometry import get_geojson
+from bootstrap import get_bootstrap_engine
+from breaks import get_break_detector
+from labels import place_series_labels, spread_labels
+from names import slugify
+
+# Kaleido is not known to be safe to call from several threads at once, so
+# PNG exports (e.g. from the export pipeline writers) run one at a time
+_IMAGE_LOCK = threading.Lock()
 
 
-def plot_evolution_regions() -> None:
+def write_figure(fig: Figure, name: str,
+                 formats: tuple = ("html", "png")) -> None:
     """
-    Plots the evolution of the Democracy Index by region from 2006 to 2024.
+    Writes a figure to `reports/html/<name>.html` and/or
+    `reports/figures/<name>.png`. PNG files are written one at a time, even
+    from several threads.
+
+    Parameters
+    ----------
+    fig : Figure
+        The figure to write.
+    name : str
+        The output file name, without extension.
+    formats : tuple, optional
+        The formats to write, among "html" and "png". By default both.
     """
-    data = Data()
-    config = Config()
-    colors = Colors()
+    if "html" in formats:
+        fig.write_html(f"reports/html/{name}.html",
+                       full_html=False, include_plotlyjs='cdn')
+    if "png" in formats:
+        with _IMAGE_LOCK:
+            fig.write_image(f"reports/figures/{name}.png")
 
-    fig = go.Figure()
 
-    fig.update_layout(
+def _get_time_series_layout() -> dict:
+    """
+    Returns the layout shared by the time-series charts: the size, the axes
+    and the margins.
+
+    Returns
+    -------
+    dict
+        The layout properties.
+    """
+    colors = Colors()
+    return dict(
         width=720, height=500, plot_bgcolor="white",
         yaxis=dict(range=[0, 10.1], tickvals=[i for i in range(11)],
                    ticks="outside", ticklen=0,
@@ -37,11 +77,85 @@ def plot_evolution_regions() -> None:
         margin=dict(l=20, r=20, t=85, b=50)
     )
 
+
+def _get_time_series_annotations() -> list[dict]:
+    """
+    Returns the annotations shared by the time-series charts: the labels of
+    the ends of the scale and the source.
+
+    Returns
+    -------
+    list[dict]
+        The annotations.
+    """
+    colors = Colors()
+    return [
+        dict(text="<b>MORE DEMOCRATIC</b>",
+             x=0.001, y=9.8, showarrow=False,
+             xref="paper", xanchor="left", yanchor="middle",
+             font={"color": colors.DARK_GRAY, "size": 10}),
+        dict(text="<b>LESS DEMOCRATIC</b>",
+             x=0.001, y=0.2, showarrow=False,
+             xref="paper", xanchor="left", yanchor="middle",
+             font={"color": colors.DARK_GRAY, "size": 10}),
+        dict(text="<b>Source(s):</b> "
+             + "<a href='https://en.wikipedia.org/wiki/The_Economist"
+             + "_Democracy_Index'>The Economist/Wikipedia</a>",
+             x=-0.03, y=-0.08, showarrow=False,
+             xref="paper", yref="paper", xanchor="left", yanchor="top",
+             font={"color": colors.DARK_GRAY, "size": 11}),
+    ]
+
+
+def plot_evolution_regions(bands: bool = False,
+                           write: bool = True) -> Figure:
+    """
+    Plots the evolution of the Democracy Index by region from 2006 to 2024.
+
+    Parameters
+    ----------
+    bands : bool, optional
+        If True, draw the 95% bootstrap confidence interval of each region
+        average as a filled band. By default False.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    data = Data()
+    config = Config()
+    colors = Colors()
+
+    fig = go.Figure()
+
+    fig.update_layout(**_get_time_series_layout())
+
     regions = list(data.df["Region"].unique())
-    y_offsets = dict(zip(regions, [-0.25, 0.25, 0.3, 0.25, 0.25, 0.25, -0.25]))
     region_df = data.get_region_averages()
+    first_year = region_df["Year"].min()
+    label_y = dict(zip(regions, spread_labels(
+        [region_df["DemocracyIndex"][(region_df["Region"] == region)
+                                     & (region_df["Year"] == first_year)]
+         .iloc[0] + 0.25 for region in regions],
+        min_gap=0.35, lower=0.5, upper=9.5).tolist()))
+    if bands:
+        _, band_df = get_bootstrap_engine().get_bands(seed=0)
     for region in regions:
         region_data = region_df[region_df["Region"] == region]
+        if bands:
+            band_data = band_df[band_df["Region"] == region]
+            fig.add_trace(
+                go.Scatter(x=np.concatenate([band_data["Year"],
+                                             band_data["Year"][::-1]]),
+                           y=np.concatenate([band_data["High"],
+                                             band_data["Low"][::-1]]),
+                           fill="toself", mode="lines", line=dict(width=0),
+                           fillcolor=config.region_colors[region],
+                           opacity=0.15, hoverinfo="skip"))
         fig.add_trace(
             go.Scatter(x=region_data["Year"], y=region_data["DemocracyIndex"],
                        mode="markers+lines", name=region,
@@ -54,9 +168,7 @@ def plot_evolution_regions() -> None:
                            font=dict(color=config.region_colors[region]))))
         fig.add_annotation(
             text="<b>" + region + "</b>", x=0.001, xref="paper",
-            y=region_data["DemocracyIndex"][
-                region_data["Year"] == 2006].values[0] + y_offsets[region],
-            showarrow=False, yanchor="middle",
+            y=label_y[region], showarrow=False, yanchor="middle",
             font={"color": config.region_colors[region], "size": 12})
 
     fig.add_annotation(
@@ -70,61 +182,67 @@ def plot_evolution_regions() -> None:
         x=-0.03, y=1.1, showarrow=False, align="left",
         xref="paper", yref="paper", xanchor="left", yanchor="middle",
         font={"color": colors.DARK_GRAY, "size": 14})
-    fig.add_annotation(
-        text="<b>MORE DEMOCRATIC</b>",
-        x=0.001, y=9.8, showarrow=False,
-        xref="paper", xanchor="left", yanchor="middle",
-        font={"color": colors.DARK_GRAY, "size": 10})
-    fig.add_annotation(
-        text="<b>LESS DEMOCRATIC</b>",
-        x=0.001, y=0.2, showarrow=False,
-        xref="paper", xanchor="left", yanchor="middle",
-        font={"color": colors.DARK_GRAY, "size": 10})
-    fig.add_annotation(
-        text="<b>Source(s):</b> "
-        + "<a href='https://en.wikipedia.org/wiki/The_Economist"
-        + "_Democracy_Index'>The Economist/Wikipedia</a>",
-        x=-0.03, y=-0.08, showarrow=False,
-        xref="paper", yref="paper", xanchor="left", yanchor="top",
-        font={"color": colors.DARK_GRAY, "size": 11})
+    for annotation in _get_time_series_annotations():
+        fig.add_annotation(annotation)
 
-    fig.write_html("reports/html/time_series_by_region.html",
-                   full_html=False, include_plotlyjs='cdn')
-    fig.write_image("reports/figures/time_series_by_region.png")
+    if write:
+        write_figure(fig, "time_series_by_region")
+    return fig
 
 
-def plot_evolution_countries() -> None:
+def plot_evolution_countries(countries: list[str] = None,
+                             breaks: bool = False,
+                             write: bool = True) -> Figure:
     """
     Plots the evolution of the Democracy Index for selected countries from
-    2006 to 2024.
+    2006 to 2024. Country labels are placed automatically next to their
+    lines, avoiding other lines and labels.
+
+    Parameters
+    ----------
+    countries : list[str], optional
+        The countries to plot. By default, a selection of six countries.
+    breaks : bool, optional
+        If True, circle the first year after each structural break detected
+        by `breaks.BreakDetector`. By default False.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
     """
     colors = Colors()
 
     fig = go.Figure()
 
-    fig.update_layout(
-        width=720, height=500, plot_bgcolor="white",
-        yaxis=dict(range=[0, 10.1], tickvals=[i for i in range(11)],
-                   ticks="outside", ticklen=0,
-                   tickfont=dict(size=14, color=colors.DARK_GRAY, weight=400),
-                   zeroline=True, zerolinewidth=2, showgrid=True,
-                   zerolinecolor=colors.DARK_GRAY, gridcolor=colors.LIGHT_GRAY,
-                   gridwidth=1, griddash="solid"),
-        xaxis=dict(range=[2005.9, 2024.1],
-                   tickvals=[year for year in range(2007, 2024, 2)],
-                   ticks="outside", tickcolor=colors.DARK_GRAY, tickwidth=2,
-                   tickfont=dict(size=14, color=colors.DARK_GRAY, weight=400),
-                   zeroline=False),
-        showlegend=False,
-        margin=dict(l=20, r=20, t=85, b=50)
-    )
-
-    _add_country(fig, "Argentina", (2018, 7.3), colors.BLUE)
-    _add_country(fig, "Mali", (2013, 6.2), colors.ORANGE)
-    _add_country(fig, "Bhutan", (2022.5, 5.25), colors.GREEN)
-    _add_country(fig, "Afghanistan", (2022.5, 0.7), colors.RED)
-    _add_country(fig, "Norway", (2018, 9.6), colors.PURPLE)
-    _add_country(fig, "Nicaragua", (2023, 1.9), colors.BROWN)
+    fig.update_layout(**_get_time_series_layout())
+
+    if countries is None:
+        countries = ["Argentina", "Mali", "Bhutan", "Afghanistan", "Norway",
+                     "Nicaragua"]
+    line_colors = [colors.BLUE, colors.ORANGE, colors.GREEN, colors.RED,
+                   colors.PURPLE, colors.BROWN, colors.PINK]
+    panel = Data().get_panel().loc[countries]
+    label_positions = place_series_labels(
+        panel.columns, panel.to_numpy(), countries, char_width=0.2,
+        height=0.35, x_range=(2005.9, 2024.1), y_range=(0, 10.1))
+    for i, country in enumerate(countries):
+        _add_country(fig, country, panel.loc[country].dropna(),
+                     label_positions[i], line_colors[i % len(line_colors)])
+    if breaks:
+        break_df = get_break_detector().get_breaks()
+        break_df = break_df[break_df["Country"].isin(countries)]
+        fig.add_trace(
+            go.Scatter(x=break_df["Year"],
+                       y=[panel.loc[c, y] for c, y in zip(break_df["Country"],
+                                                          break_df["Year"])],
+                       mode="markers", hoverinfo="skip",
+                       marker=dict(size=14, color="rgba(0, 0, 0, 0)",
+                                   line=dict(color=colors.DARK_GRAY,
+                                             width=1.5))))
 
     fig.add_annotation(
         text="<b>The Economist Democracy Index, 2006 - 2024</b>",
@@ -137,31 +255,16 @@ def plot_evolution_countries() -> None:
         x=-0.03, y=1.1, showarrow=False, align="left",
         xref="paper", yref="paper", xanchor="left", yanchor="middle",
         font={"color": colors.DARK_GRAY, "size": 14})
-    fig.add_annotation(
-        text="<b>MORE DEMOCRATIC</b>",
-        x=0.001, y=9.8, showarrow=False,
-        xref="paper", xanchor="left", yanchor="middle",
-        font={"color": colors.DARK_GRAY, "size": 10})
-    fig.add_annotation(
-        text="<b>LESS DEMOCRATIC</b>",
-        x=0.001, y=0.2, showarrow=False,
-        xref="paper", xanchor="left", yanchor="middle",
-        font={"color": colors.DARK_GRAY, "size": 10})
-    fig.add_annotation(
-        text="<b>Source(s):</b> "
-        + "<a href='https://en.wikipedia.org/wiki/The_Economist"
-        + "_Democracy_Index'>The Economist/Wikipedia</a>",
-        x=-0.03, y=-0.08, showarrow=False,
-        xref="paper", yref="paper", xanchor="left", yanchor="top",
-        font={"color": colors.DARK_GRAY, "size": 11})
+    for annotation in _get_time_series_annotations():
+        fig.add_annotation(annotation)
 
-    fig.write_html("reports/html/time_series_by_country.html",
-                   full_html=False, include_plotlyjs='cdn')
-    fig.write_image("reports/figures/time_series_by_country.png")
+    if write:
+        write_figure(fig, "time_series_by_country")
+    return fig
 
 
-def _add_country(fig: Figure, country: str, label_pos: tuple,
-                 color: str) -> None:
+def _add_country(fig: Figure, country: str, series: pd.Series,
+                 label_pos: tuple, color: str) -> None:
     """
     Adds a country to the figure with its corresponding data.
 
@@ -171,16 +274,15 @@ def _add_country(fig: Figure, country: str, label_pos: tuple,
         The Plotly figure instance to add the country to.
     country : str
         The name of the country to add.
+    series : pd.Series
+        The democracy index of the country, indexed by year.
     label_pos : tuple
         The x and y coordinates for the label position.
     color : str
         The color for the country line and label.
     """
-    data = Data()
-    country_data = data.df[data.df["Country"] == country]
     fig.add_trace(
-        go.Scatter(x=country_data["Year"],
-                   y=country_data["DemocracyIndex"],
+        go.Scatter(x=series.index, y=series.to_numpy(),
                    mode="markers+lines", name=country,
                    line=dict(color=color, width=2),
                    hovertemplate="<b>%{data.name}</b><br>Year: %{x}<br>"
@@ -195,7 +297,266 @@ def _add_country(fig: Figure, country: str, label_pos: tuple,
         font={"color": color, "size": 12})
 
 
-def plot_world_map_index(year: int) -> None:
+def get_small_multiples_panel(by: str = "Country",
+                              entities: list[str] = None) -> pd.DataFrame:
+    """
+    Returns the series drawn by the small multiples, in one pass over the
+    data: one row per entity (a country or a region) and one column per
+    year, plus the region of each entity.
+
+    Parameters
+    ----------
+    by : str, optional
+        Either "Country" (the default) or "Region".
+    entities : list[str], optional
+        The countries or regions to keep, in this order. By default all of
+        them, sorted by name.
+
+    Returns
+    -------
+    pd.DataFrame
+        The panel, with a `Region` column followed by the years.
+    """
+    data = Data()
+    if by == "Country":
+        panel = data.get_panel()
+        regions = data.df.groupby("Country")["Region"].first()
+    elif by == "Region":
+        panel = data.get_region_averages().pivot(
+            index="Region", columns="Year", values="DemocracyIndex")
+        panel.index = panel.index.astype(str)
+        regions = pd.Series(panel.index, index=panel.index)
+    else:
+        raise ValueError(f"Invalid value for `by`: {by}.")
+    panel.insert(0, "Region", regions.reindex(panel.index).astype(str))
+    if entities is not None:
+        panel = panel.loc[entities]
+    return panel
+
+
+def _get_small_multiple_trace(name: str, years: np.ndarray,
+                              values: np.ndarray, color: str) -> dict:
+    """
+    Returns the trace of one entity of the small multiples, as a plain
+    dictionary (building Plotly objects for every entity is much slower).
+
+    Parameters
+    ----------
+    name : str
+        The name of the entity.
+    years : np.ndarray
+        The years.
+    values : np.ndarray
+        The democracy index of each year, NaN where missing.
+    color : str
+        The color of the line.
+
+    Returns
+    -------
+    dict
+        The trace.
+    """
+    valid = ~np.isnan(values)
+    return dict(
+        type="scatter", x=years[valid].tolist(), y=values[valid].tolist(),
+        mode="markers+lines", name=name,
+        line=dict(color=color, width=2),
+        hovertemplate="<b>%{data.name}</b><br>Year: %{x}<br>"
+                      "Index: %{y}<extra></extra>",
+        hoverlabel=dict(bgcolor="white", bordercolor="rgb(0, 0, 0, 0)",
+                        font=dict(color=color)))
+
+
+def get_small_multiples(by: str = "Country", entities: list[str] = None,
+                        html: bool = False) -> dict:
+    """
+    Builds one time-series chart per country or region. The data is read
+    once and every chart shares the same layout, so all of them are
+    produced in a few seconds.
+
+    Parameters
+    ----------
+    by : str, optional
+        Either "Country" (the default) or "Region".
+    entities : list[str], optional
+        The countries or regions to plot. By default all of them.
+    html : bool, optional
+        If True, return HTML fragments (which load Plotly from its CDN)
+        instead of figures. By default False.
+
+    Returns
+    -------
+    dict
+        The figure or HTML fragment of each entity, by name.
+    """
+    colors = Colors()
+    config = Config()
+    panel = get_small_multiples_panel(by, entities)
+    years = panel.columns[1:].to_numpy()
+    values = panel[panel.columns[1:]].to_numpy(dtype=float)
+
+    # Validate the shared layout once and reuse its JSON form
+    layout = go.Layout(_get_time_series_layout())
+    layout.update(margin=dict(t=60))
+    layout = layout.to_plotly_json()
+    annotations = [go.layout.Annotation(a).to_plotly_json()
+                   for a in _get_time_series_annotations()]
+
+    charts = {}
+    for name, region, row in zip(panel.index, panel["Region"], values):
+        color = config.region_colors[region]
+        subtitle = "" if by == "Region" else f"<br>{region}"
+        title = dict(
+            text=f"<b>{name}</b>" + subtitle, x=-0.03, y=1.14,
+            showarrow=False, align="left", xref="paper", yref="paper",
+            xanchor="left", yanchor="middle",
+            font={"color": colors.DARK_GRAY, "size": 16})
+        chart = dict(
+            data=[_get_small_multiple_trace(name, years, row, color)],
+            layout=dict(layout, annotations=annotations + [title]))
+        if html:
+            charts[name] = pio.to_html(chart, full_html=False,
+                                       include_plotlyjs="cdn",
+                                       validate=False)
+        else:
+            charts[name] = go.Figure(chart, skip_invalid=True)
+    return charts
+
+
+def write_small_multiples(by: str = "Country", entities: list[str] = None,
+                          directory: str = None) -> list[str]:
+    """
+    Writes the HTML fragment of the chart of each country or region (see
+    `get_small_multiples`) to `<directory>/<name>.html`, where the name is
+    made of lowercase letters, digits and underscores.
+
+    Parameters
+    ----------
+    by : str, optional
+        Either "Country" (the default) or "Region".
+    entities : list[str], optional
+        The countries or regions to plot. By default all of them.
+    directory : str, optional
+        The output directory. By default `reports/html/countries` or
+        `reports/html/regions`.
+
+    Returns
+    -------
+    list[str]
+        The paths of the files written.
+    """
+    if directory is None:
+        directory = "reports/html/" + \
+            {"Country": "countries", "Region": "regions"}.get(by, "")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, fragment in get_small_multiples(by, entities, True).items():
+        path = os.path.join(directory, slugify(name) + ".html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(fragment)
+        paths.append(path)
+    return paths
+
+
+def plot_small_multiples(by: str = "Region", entities: list[str] = None,
+                         n_cols: int = None, write: bool = True) -> Figure:
+    """
+    Plots the evolution of the Democracy Index of each country or region in
+    its own panel of a single faceted figure.
+
+    Parameters
+    ----------
+    by : str, optional
+        Either "Country" or "Region" (the default).
+    entities : list[str], optional
+        The countries or regions to plot. By default all of them.
+    n_cols : int, optional
+        The number of columns of the grid. By default 4 for regions and 8
+        for countries.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    colors = Colors()
+    config = Config()
+    panel = get_small_multiples_panel(by, entities)
+    years = panel.columns[1:].to_numpy()
+    values = panel[panel.columns[1:]].to_numpy(dtype=float)
+
+    n_cols = n_cols or (4 if by == "Region" else 8)
+    n_cols = min(n_cols, len(panel))
+    n_rows = -(-len(panel) // n_cols)
+    fig = make_subplots(
+        rows=n_rows, cols=n_cols, shared_xaxes=True, shared_yaxes=True,
+        subplot_titles=[f"<b>{name}</b>" for name in panel.index],
+        horizontal_spacing=0.02, vertical_spacing=0.3 / n_rows)
+    fig.add_traces(
+        [_get_small_multiple_trace(name, years, row,
+                                   config.region_colors[region])
+         for name, region, row in zip(panel.index, panel["Region"], values)],
+        rows=[i // n_cols + 1 for i in range(len(panel))],
+        cols=[i % n_cols + 1 for i in range(len(panel))])
+
+    fig.update_annotations(font=dict(color=colors.DARK_GRAY, size=10))
+    fig.update_yaxes(range=[0, 10.1], tickvals=[0, 5, 10], showgrid=True,
+                     gridcolor=colors.LIGHT_GRAY, zeroline=True,
+                     zerolinecolor=colors.DARK_GRAY,
+                     tickfont=dict(size=10, color=colors.DARK_GRAY))
+    fig.update_xaxes(range=[2005.9, 2024.1], tickvals=[2010, 2020],
+                     tickfont=dict(size=10, color=colors.DARK_GRAY))
+    fig.update_layout(
+        width=180 * n_cols, height=80 + 150 * n_rows, plot_bgcolor="white",
+        showlegend=False, margin=dict(l=20, r=20, t=80, b=50))
+
+    fig.add_annotation(
+        text="<b>The Economist Democracy Index, 2006 - 2024</b>",
+        x=0, y=1, yshift=60, showarrow=False,
+        xref="paper", yref="paper", xanchor="left", yanchor="middle",
+        font={"color": colors.DARK_GRAY, "size": 20})
+    fig.add_annotation(
+        text="<b>Source(s):</b> "
+        + "<a href='https://en.wikipedia.org/wiki/The_Economist"
+        + "_Democracy_Index'>The Economist/Wikipedia</a>",
+        x=0, y=0, yshift=-30, showarrow=False,
+        xref="paper", yref="paper", xanchor="left", yanchor="top",
+        font={"color": colors.DARK_GRAY, "size": 11})
+
+    if write:
+        write_figure(fig, f"small_multiples_by_{by.lower()}")
+    return fig
+
+
+def _get_map_locations(df: pd.DataFrame, detail: str = None) -> dict:
+    """
+    Returns the keyword arguments that tell a Plotly choropleth where to draw
+    each row of the DataFrame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The geographic DataFrame.
+    detail : str, optional
+        The level of detail of the project geometry (see
+        `geometry.DETAIL_LEVELS`). If None (the default), Plotly's built-in
+        world geometry is used.
+
+    Returns
+    -------
+    dict
+        The keyword arguments for `go.Choropleth`.
+    """
+    if detail is None:
+        return dict(locations=df['ISO_A3_EH'])
+    return dict(locations=df['ADM0_A3'], geojson=get_geojson(detail))
+
+
+def plot_world_map_index(year: int, detail: str = None,
+                         write: bool = True) -> Figure:
     """
     Plots a world map of the Democracy Index for a given year.
 
@@ -203,13 +564,25 @@ def plot_world_map_index(year: int) -> None:
     ----------
     year : int
         The year for which to plot the map.
+    detail : str, optional
+        The level of detail of the project geometry (see
+        `geometry.DETAIL_LEVELS`). If None (the default), Plotly's built-in
+        world geometry is used.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
     """
     df = get_yearly_geographic_data(year=year)
     colors = Colors()
 
     fig = go.Figure(
         data=go.Choropleth(
-            locations=df['ISO_A3_EH'], z=df['DemocracyIndex'],
+            **_get_map_locations(df, detail), z=df['DemocracyIndex'],
             text=df['Country'], colorscale='viridis',
             autocolorscale=False, marker_line_color='white',
             marker_line_width=0.3, zmin=0, zmax=10,
@@ -251,12 +624,14 @@ def plot_world_map_index(year: int) -> None:
         xref="paper", yref="paper", xanchor="left", yanchor="middle",
         font={"color": colors.DARK_GRAY, "size": 11})
 
-    fig.write_html(f"reports/html/map_index_{year}.html",
-                   full_html=False, include_plotlyjs='cdn')
-    fig.write_image(f"reports/figures/map_index_{year}.png")
+    if write:
+        write_figure(fig, f"map_index_{year}")
+    return fig
 
 
-def plot_world_map_index_change(start_year: int, end_year: int) -> None:
+def plot_world_map_index_change(start_year: int, end_year: int,
+                                detail: str = None,
+                                write: bool = True) -> Figure:
     """
     Plots a world map of the change in the Democracy Index between two years.
 
@@ -266,13 +641,25 @@ def plot_world_map_index_change(start_year: int, end_year: int) -> None:
         The starting year for the change calculation.
     end_year : int
         The ending year for the change calculation.
+    detail : str, optional
+        The level of detail of the project geometry (see
+        `geometry.DETAIL_LEVELS`). If None (the default), Plotly's built-in
+        world geometry is used.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
     """
     colors = Colors()
     df = get_index_change_geographic_data(start_year, end_year)
 
     fig = go.Figure(
         data=go.Choropleth(
-            locations=df['ISO_A3_EH'], z=df['IndexChange'],
+            **_get_map_locations(df, detail), z=df['IndexChange'],
             text=df['Country'],
             colorscale=colors.colorscales["RdWtGr"],
             autocolorscale=False, marker_line_color='white',
@@ -317,16 +704,29 @@ def plot_world_map_index_change(start_year: int, end_year: int) -> None:
         xref="paper", yref="paper", xanchor="left", yanchor="middle",
         font={"color": colors.DARK_GRAY, "size": 11})
 
-    fig.write_html(f"reports/html/map_index_change_{start_year}"
-                   f"_to_{end_year}.html",
-                   full_html=False, include_plotlyjs='cdn')
-    fig.write_image(f"reports/figures/map_index_change_{start_year}"
-                    f"_to_{end_year}.png")
+    if write:
+        write_figure(fig, f"map_index_change_{start_year}_to_{end_year}")
+    return fig
 
 
-def plot_regions() -> None:
+def plot_regions(detail: str = None, write: bool = True) -> Figure:
     """
     Plots a world map of the regions defined in the project.
+
+    Parameters
+    ----------
+    detail : str, optional
+        The level of detail of the project geometry (see
+        `geometry.DETAIL_LEVELS`). If None (the default), Plotly's built-in
+        world geometry is used.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
     """
     df = get_yearly_geographic_data(year=2006)
     colors = Colors()
@@ -341,7 +741,8 @@ def plot_regions() -> None:
 
     fig = go.Figure(
         data=go.Choropleth(
-            locations=df['ISO_A3_EH'], z=df['RegionCode'], text=df['Country'],
+            **_get_map_locations(df, detail), z=df['RegionCode'],
+            text=df['Country'],
             colorscale=colorscale, customdata=df['Region'],
             marker_line_color='white',
             showscale=False,
@@ -387,12 +788,13 @@ def plot_regions() -> None:
         xref="paper", yref="paper", xanchor="left", yanchor="middle",
         font={"color": colors.DARK_GRAY, "size": 11})
 
-    fig.write_html("reports/html/map_regions.html",
-                   full_html=False, include_plotlyjs='cdn')
-    fig.write_image("reports/figures/map_regions.png")
+    if write:
+        write_figure(fig, "map_regions")
+    return fig
 
 
-def plot_regime_migration(start_year: int, end_year: int) -> None:
+def plot_regime_migration(start_year: int, end_year: int,
+                          write: bool = True) -> Figure:
     """
     Plots a heatmap of regime type changes between two years.
 
@@ -402,6 +804,14 @@ def plot_regime_migration(start_year: int, end_year: int) -> None:
         The starting year for the reigme change calculation.
     end_year : int
         The ending year for the reigme change calculation.
+    write : bool, optional
+        If True (the default), write the figure to `reports/html` and
+        `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
     """
     colors = Colors()
     m = get_migration_matrix(start_year, end_year)
@@ -558,18 +968,7 @@ def plot_regime_migration(start_year: int, end_year: int) -> None:
         margin=dict(l=150, r=8, t=170, b=25),
     )
 
-    fig.write_html("reports/html/regime_migration.html",
-                   full_html=False, include_plotlyjs='cdn')
-    fig.write_image("reports/figures/regime_migration.png")
-
-
-if __name__ == "__main__":
-    # plot_evolution_regions()
-    # plot_evolution_countries()
-    # plot_world_map_index(year=2006)
-    # plot_world_map_index(year=2024)
-    # plot_world_map_index_change(start_year=2006, end_year=2015)
-    # plot_world_map_index_change(start_year=2006, end_year=2024)
-    # plot_world_map_index_change(start_year=2020, end_year=2024)
-    # plot_regions()
-    plot_regime_migration(start_year=2006, end_year=2024)
+    if write:
+        write_figure(fig, "regime_migration")
+    return fig
+
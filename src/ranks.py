@@ -0,0 +1,215 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data import Data
+
+
+def competition_rank(values: np.ndarray,
+                     groups: np.ndarray = None) -> np.ndarray:
+    """
+    Ranks the rows of each column in descending order, giving tied values
+    the same (lowest) rank and skipping the following ones (1, 2, 2, 4).
+    This matches the ranking published by the Economist. All columns are
+    ranked at once; missing values get a NaN rank.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values to rank, with shape (n_rows, n_columns).
+    groups : np.ndarray, optional
+        An integer group code for each row. If given, rows are ranked within
+        their group.
+
+    Returns
+    -------
+    np.ndarray
+        The ranks, with the same shape as `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    n_rows = values.shape[0]
+    if groups is None:
+        groups = np.zeros(n_rows, dtype=np.int64)
+    groups = np.asarray(groups)[:, None]
+
+    # Sort by group and then by descending value (missing values last)
+    order = np.lexsort((-values, np.broadcast_to(groups, values.shape)),
+                       axis=0)
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    sorted_groups = np.take_along_axis(
+        np.broadcast_to(groups, values.shape), order, axis=0)
+
+    position = np.broadcast_to(np.arange(n_rows)[:, None], values.shape)
+    new_group = np.ones(values.shape, dtype=bool)
+    new_group[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    new_value = new_group.copy()
+    new_value[1:] |= sorted_values[1:] != sorted_values[:-1]
+    group_start = np.maximum.accumulate(
+        np.where(new_group, position, 0), axis=0)
+    value_start = np.maximum.accumulate(
+        np.where(new_value, position, 0), axis=0)
+
+    sorted_ranks = (value_start - group_start + 1).astype(float)
+    sorted_ranks[np.isnan(sorted_values)] = np.nan
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=0)
+    return ranks
+
+
+class RankEngine:
+    """
+    A class that computes the world and regional ranks of every country for
+    every year at once. Queries are answered by indexing the precomputed
+    rank arrays.
+    """
+    def __init__(self, data: Data = None):
+        data = Data() if data is None else data
+        panel = data.get_panel()
+
+        self.countries = panel.index.to_numpy()
+        self.years = panel.columns.to_numpy()
+        self.values = panel.to_numpy()
+        self.regions = data.df.groupby("Country")["Region"].first().reindex(
+            self.countries).astype(str).to_numpy()
+        _, region_codes = np.unique(self.regions, return_inverse=True)
+
+        self.ranks = competition_rank(self.values)
+        self.region_ranks = competition_rank(self.values, region_codes)
+
+        self._country_pos = pd.Index(self.countries)
+        self._year_pos = pd.Index(self.years)
+
+    def _country_idx(self, countries: list[str]) -> np.ndarray:
+        """
+        Returns the row numbers of the given countries.
+
+        Parameters
+        ----------
+        countries : list[str]
+            The countries.
+
+        Returns
+        -------
+        np.ndarray
+            The row numbers.
+        """
+        idx = self._country_pos.get_indexer(countries)
+        if (idx < 0).any():
+            missing = np.asarray(countries)[idx < 0]
+            raise KeyError(f"Unknown countries: {', '.join(missing)}.")
+        return idx
+
+    def _year_idx(self, year: int) -> int:
+        """
+        Returns the column number of the given year.
+
+        Parameters
+        ----------
+        year : int
+            The year.
+
+        Returns
+        -------
+        int
+            The column number.
+        """
+        if year not in self._year_pos:
+            raise KeyError(f"No data for year {year}.")
+        return self._year_pos.get_loc(year)
+
+    def get_ranks(self, year: int) -> pd.DataFrame:
+        """
+        Returns the world and regional ranks of every country in a given
+        year, sorted by world rank.
+
+        Parameters
+        ----------
+        year : int
+            The year.
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame with the columns `Country`, `Region`,
+            `DemocracyIndex`, `Rank` and `RegionRank`.
+        """
+        j = self._year_idx(year)
+        df = pd.DataFrame({
+            "Country": self.countries, "Region": self.regions,
+            "DemocracyIndex": self.values[:, j], "Rank": self.ranks[:, j],
+            "RegionRank": self.region_ranks[:, j]})
+        return df.sort_values(["Rank", "Country"]).reset_index(drop=True)
+
+    def get_trajectories(self, countries: list[str],
+                         by_region: bool = False) -> pd.DataFrame:
+        """
+        Returns the rank of the given countries for every year.
+
+        Parameters
+        ----------
+        countries : list[str]
+            The countries.
+        by_region : bool, optional
+            If True, return the rank within the region instead of the world
+            rank. By default False.
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame with one row per country and one column per year.
+        """
+        ranks = self.region_ranks if by_region else self.ranks
+        idx = self._country_idx(countries)
+        return pd.DataFrame(ranks[idx], index=self.countries[idx],
+                            columns=self.years)
+
+    def get_biggest_movers(self, start_year: int, end_year: int,
+                           n: int = 10, by_region: bool = False
+                           ) -> pd.DataFrame:
+        """
+        Returns the countries with the largest rank changes between two
+        years. A positive `RankChange` means the country climbed.
+
+        Parameters
+        ----------
+        start_year : int
+            The starting year.
+        end_year : int
+            The ending year.
+        n : int, optional
+            The number of countries to return. By default 10.
+        by_region : bool, optional
+            If True, use the rank within the region instead of the world
+            rank. By default False.
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame with the columns `Country`, `Region`, `StartRank`,
+            `EndRank` and `RankChange`, sorted by absolute change.
+        """
+        ranks = self.region_ranks if by_region else self.ranks
+        start = ranks[:, self._year_idx(start_year)]
+        end = ranks[:, self._year_idx(end_year)]
+        change = start - end
+        order = np.argsort(-np.nan_to_num(np.abs(change), nan=-1),
+                           kind="stable")[:n]
+        return pd.DataFrame({
+            "Country": self.countries[order], "Region": self.regions[order],
+            "StartRank": start[order], "EndRank": end[order],
+            "RankChange": change[order]})
+
+
+@lru_cache(maxsize=None)
+def get_rank_engine() -> RankEngine:
+    """
+    Returns the rank engine for the democracy index data, built once per
+    session.
+
+    Returns
+    -------
+    RankEngine
+        The rank engine.
+    """
+    return RankEngine()
@@ -1,6 +1,8 @@
 import pandas as pd
 import wikipedia as wp
 
+from names import strip_soft_hyphens
+
 
 def get_raw_data() -> None:
     """
@@ -15,11 +17,7 @@ def get_raw_data() -> None:
 
     df.rename(columns={"Regime type": "RegimeType"}, inplace=True)
     df = df.map(
-        lambda x: x.replace("Asia and Austral\xadasia",
-                            "Asia and Australasia").replace(
-                                "Latin America and the Carib\xadbean",
-                                "Latin America and the Caribbean"
-                            ) if isinstance(x, str) else x)
+        lambda x: strip_soft_hyphens(x) if isinstance(x, str) else x)
     df.to_csv("data/raw/democracy_index.csv", index=False)
 
 
@@ -0,0 +1,202 @@
+import json
+import string
+import sys
+
+import yaml
+
+import plots
+import static_plots
+from data import Data
+from export import ExportJob, export
+from names import slugify
+
+
+# Figure types of the report specification: the plotting function and the
+# default output name, formatted with the parameters of each job
+FIGURE_TYPES = {
+    "time_series_regions": (plots.plot_evolution_regions,
+                            "time_series_by_region"),
+    "time_series_countries": (plots.plot_evolution_countries,
+                              "time_series_by_country"),
+    "map_index": (plots.plot_world_map_index, "map_index_{year}"),
+    "map_index_change": (plots.plot_world_map_index_change,
+                         "map_index_change_{start_year}_to_{end_year}"),
+    "map_regions": (plots.plot_regions, "map_regions"),
+    "regime_migration": (plots.plot_regime_migration,
+                         "regime_migration_{start_year}_to_{end_year}"),
+    "small_multiples": (plots.plot_small_multiples, "small_multiples"),
+}
+
+# Figure types that the Matplotlib backend can render, with their plotting
+# function
+STATIC_FIGURE_TYPES = {
+    "time_series_regions": static_plots.plot_evolution_regions,
+    "time_series_countries": static_plots.plot_evolution_countries,
+    "map_index": static_plots.plot_world_map_index,
+    "map_index_change": static_plots.plot_world_map_index_change,
+    "map_regions": static_plots.plot_regions,
+    "regime_migration": static_plots.plot_regime_migration,
+}
+
+DEFAULT_SPEC = "reports/report.json"
+
+
+def load_spec(path: str = DEFAULT_SPEC) -> dict:
+    """
+    Loads a report specification from a JSON or YAML file.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the file. By default `reports/report.json`.
+
+    Returns
+    -------
+    dict
+        The report specification.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def expand_spec(spec: dict) -> list[ExportJob]:
+    """
+    Expands a report specification into export jobs.
+
+    The specification has a list of `figures` and optional default
+    `formats`. Each figure has a `type` (a key of `FIGURE_TYPES`) and may
+    set:
+
+    - `years`: a list of years, one job per year (`map_index`).
+    - `year_pairs`: a list of `[start_year, end_year]` pairs, one job per
+      pair (`map_index_change`, `regime_migration`).
+    - `countries`: a list of countries, or "*" for all of them
+      (`time_series_countries`). With `each` set to true, one job is
+      created per country.
+    - `name`: the output name, which may use the fields `{year}`,
+      `{start_year}`, `{end_year}` and `{country}` (the slug of the
+      country, required with `each`).
+    - `formats`: the output formats of this figure.
+    - `options`: additional keyword arguments of the plotting function,
+      e.g. `{"detail": "low"}`.
+    - `backend`: "plotly" (the default) or "matplotlib", which renders
+      PNG files with `static_plots` without starting a browser. The
+      default backend of all figures can also be set at the top level.
+
+    Parameters
+    ----------
+    spec : dict
+        The report specification.
+
+    Returns
+    -------
+    list[ExportJob]
+        The export jobs.
+    """
+    all_countries = None
+    jobs = []
+    for figure in spec["figures"]:
+        if figure["type"] not in FIGURE_TYPES:
+            raise ValueError(f"Unknown figure type: {figure['type']}.")
+        builder, default_name = FIGURE_TYPES[figure["type"]]
+        name = figure.get("name", default_name)
+        formats = tuple(figure.get("formats",
+                                   spec.get("formats", ("html", "png"))))
+        writer = None
+        backend = figure.get("backend", spec.get("backend", "plotly"))
+        if backend == "matplotlib":
+            if figure["type"] not in STATIC_FIGURE_TYPES:
+                raise ValueError(f"Figure type {figure['type']} is not "
+                                 "supported by the matplotlib backend.")
+            builder = STATIC_FIGURE_TYPES[figure["type"]]
+            writer = static_plots.write_figure
+            formats = tuple(f for f in formats if f != "html") or ("png",)
+        elif backend != "plotly":
+            raise ValueError(f"Unknown backend: {backend}.")
+        options = figure.get("options", {})
+
+        variants = [{}]
+        if "years" in figure:
+            variants = [{"year": year} for year in figure["years"]]
+        elif "year_pairs" in figure:
+            variants = [{"start_year": start, "end_year": end}
+                        for start, end in figure["year_pairs"]]
+        elif "countries" in figure:
+            countries = figure["countries"]
+            if countries == "*":
+                if all_countries is None:
+                    all_countries = sorted(Data().df["Country"].unique())
+                countries = all_countries
+            if figure.get("each", False):
+                if "name" not in figure:
+                    name = f"{default_name}_{{country}}"
+                fields = {field for _, field, _, _
+                          in string.Formatter().parse(name)}
+                if "country" not in fields:
+                    raise ValueError(f"The name of a figure with `each` "
+                                     f"must contain {{country}}: {name}.")
+                variants = [{"countries": [country]}
+                            for country in countries]
+            else:
+                variants = [{"countries": list(countries)}]
+
+        for kwargs in variants:
+            fields = dict(kwargs)
+            if len(kwargs.get("countries", [])) == 1:
+                fields["country"] = slugify(kwargs["countries"][0])
+            jobs.append(ExportJob(name.format(**fields), builder,
+                                  {**options, **kwargs}, formats, writer))
+    return jobs
+
+
+def write_pages(spec: dict) -> list[str]:
+    """
+    Writes the per-entity chart pages listed under the `pages` key of a
+    report specification. Each entry has a `by` field ("Country" or
+    "Region") and may set `entities` and `directory` (see
+    `plots.write_small_multiples`).
+
+    Parameters
+    ----------
+    spec : dict
+        The report specification.
+
+    Returns
+    -------
+    list[str]
+        The paths of the files written.
+    """
+    paths = []
+    for page in spec.get("pages", []):
+        paths += plots.write_small_multiples(
+            page["by"], page.get("entities"), page.get("directory"))
+    return paths
+
+
+def load_jobs(path: str = DEFAULT_SPEC) -> list[ExportJob]:
+    """
+    Loads a report specification and expands it into export jobs.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path of the file. By default `reports/report.json`.
+
+    Returns
+    -------
+    list[ExportJob]
+        The export jobs.
+    """
+    return expand_spec(load_spec(path))
+
+
+if __name__ == "__main__":
+    spec = load_spec(*sys.argv[1:2])
+    run_report = export(expand_spec(spec))
+    print(f"Wrote {len(write_pages(spec))} chart pages.")
+    print(run_report.to_string(index=False))
+    failed = run_report[run_report["Error"].notna()]
+    if not failed.empty:
+        raise SystemExit(f"{len(failed)} export stage(s) failed.")
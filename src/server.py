@@ -0,0 +1,213 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data import Data, get_merged_dataframe, get_yearly_data
+from data import get_index_change_geographic_data, get_migration_matrix
+
+
+class QueryService:
+    """
+    A class that answers read-only JSON queries about the democracy index.
+    The data is loaded once and responses are kept in an LRU cache, together
+    with their gzip-compressed version and ETag.
+
+    The available routes are:
+
+    - `/countries`: the list of countries.
+    - `/countries/<country>`: the democracy index series of a country.
+    - `/regions`: the average democracy index of each region and year.
+    - `/years/<year>`: the map frame (country, ISO code, region, index and
+      regime type) of a year. Countries without a shape in the map have no
+      ISO code.
+    - `/change/<start_year>/<end_year>`: the index change of each country.
+    - `/migration/<start_year>/<end_year>`: the regime migration matrix.
+    """
+    def __init__(self, cache_size: int = 256):
+        self.data = Data()
+        self.merged_df = pd.DataFrame(
+            get_merged_dataframe().drop(columns="geometry"))
+        self.iso_codes = self.merged_df.dropna(
+            subset=["Country"]).drop_duplicates("Country").set_index(
+                "Country")["ISO_A3_EH"]
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _route(self, path: str):
+        """
+        Computes the payload of a route.
+
+        Parameters
+        ----------
+        path : str
+            The request path.
+
+        Returns
+        -------
+        object
+            A JSON-serializable payload, or None if the route is unknown.
+        """
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        if parts == ["countries"]:
+            return sorted(self.data.df["Country"].unique().tolist())
+        if len(parts) == 2 and parts[0] == "countries":
+            df = self.data.filter_by_country([parts[1]])
+            if df.empty:
+                return None
+            return {"Country": parts[1],
+                    "Region": str(df["Region"].iloc[0]),
+                    "Series": _records(df.sort_values("Year")[
+                        ["Year", "DemocracyIndex"]])}
+        if parts == ["regions"]:
+            return _records(self.data.get_region_averages())
+        if len(parts) == 2 and parts[0] == "years":
+            year = int(parts[1])
+            df = get_yearly_data(year, self.data)
+            if df.empty:
+                return None
+            df = df.assign(
+                ISO_A3_EH=df["Country"].map(self.iso_codes))
+            return _records(df[["Country", "ISO_A3_EH", "Region",
+                                "DemocracyIndex", "RegimeType"]])
+        if len(parts) == 3 and parts[0] in ("change", "migration"):
+            start_year, end_year = int(parts[1]), int(parts[2])
+            years = self.data.df["Year"].unique()
+            if start_year not in years or end_year not in years:
+                return None
+            if parts[0] == "change":
+                df = get_index_change_geographic_data(
+                    start_year, end_year, self.merged_df)
+                return _records(df[["Country", "ISO_A3_EH", "IndexChange"]]
+                                .dropna(subset=["Country"]))
+            m = get_migration_matrix(start_year, end_year, self.data)
+            return np.where(np.isnan(m), None, m).tolist()
+        return None
+
+    def get(self, path: str) -> tuple:
+        """
+        Returns the response of a route, from the cache if possible.
+
+        Parameters
+        ----------
+        path : str
+            The request path.
+
+        Returns
+        -------
+        tuple
+            The HTTP status, the JSON body, its gzip-compressed version and
+            its ETag.
+        """
+        path = urlsplit(path).path
+        with self._lock:
+            if path in self._cache:
+                self._cache.move_to_end(path)
+                return self._cache[path]
+
+        try:
+            payload = self._route(path)
+            status = 200 if payload is not None else 404
+        except ValueError:
+            payload, status = None, 400
+        if payload is None:
+            payload = {"error": f"Invalid route: {path}"}
+
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        response = (status, body, gzip.compress(body), etag)
+        if status == 200:
+            with self._lock:
+                self._cache[path] = response
+                self._cache.move_to_end(path)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return response
+
+
+def _records(df: pd.DataFrame) -> list:
+    """
+    Converts a DataFrame into a list of records, with missing values as
+    None.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame.
+
+    Returns
+    -------
+    list
+        The records.
+    """
+    return json.loads(df.to_json(orient="records"))
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP handler of the query server. It supports conditional requests
+    (`If-None-Match`) and gzip compression (`Accept-Encoding`).
+    """
+    service = None
+
+    def do_GET(self) -> None:
+        status, body, gzipped, etag = self.service.get(self.path)
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        content = gzipped if use_gzip else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000,
+                service: QueryService = None) -> ThreadingHTTPServer:
+    """
+    Creates the query server. Use port 0 to pick a free port.
+
+    Parameters
+    ----------
+    host : str, optional
+        The host to bind to. By default "127.0.0.1".
+    port : int, optional
+        The port to bind to. By default 8000.
+    service : QueryService, optional
+        The service that answers the queries. By default a new one is
+        created (which loads the data).
+
+    Returns
+    -------
+    ThreadingHTTPServer
+        The server, ready to `serve_forever`.
+    """
+    handler = type("Handler", (QueryRequestHandler,),
+                   {"service": service or QueryService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    server = make_server()
+    print(f"Serving on http://{server.server_address[0]}:"
+          f"{server.server_address[1]}")
+    server.serve_forever()
@@ -0,0 +1,505 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+
+from data import Data
+
+
+METRICS = ["euclidean", "correlation", "dtw"]
+
+# Number of rows compared at once, which bounds the memory used by the
+# intermediate arrays
+CHUNK_SIZE = 512
+
+
+def make_synthetic_panel(n_entities: int, years: list[int] = None,
+                         missing: float = 0.05, seed=None) -> pd.DataFrame:
+    """
+    Generates a synthetic democracy index panel, to test the engine with
+    many more entities than there are countries. Each series is a random
+    walk with occasional large shifts (e.g. coups), kept within 0 and 10,
+    with a fraction of the values removed at random.
+
+    Parameters
+    ----------
+    n_entities : int
+        The number of entities (rows).
+    years : list[int], optional
+        The years (columns). By default those of the real data.
+    missing : float, optional
+        The fraction of missing values. By default 0.05.
+    seed : int or np.random.Generator, optional
+        The seed or random number generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        The panel, with one row per entity and one column per year.
+    """
+    rng = np.random.default_rng(seed)
+    if years is None:
+        years = [2006, 2008] + list(range(2010, 2025))
+    start = rng.uniform(0.5, 9.5, size=(n_entities, 1))
+    steps = rng.normal(0.0, 0.15, size=(n_entities, len(years) - 1))
+    shocks = rng.normal(0.0, 2.0, size=steps.shape) \
+        * (rng.random(steps.shape) < 0.02)
+    values = np.clip(np.hstack([start, start + np.cumsum(
+        steps + shocks, axis=1)]), 0.0, 10.0).round(2)
+    values[rng.random(values.shape) < missing] = np.nan
+    return pd.DataFrame(
+        values, columns=pd.Index(years, name="Year"),
+        index=pd.Index([f"Entity {i}" for i in range(n_entities)],
+                       name="Country"))
+
+
+def _fill_missing(values: np.ndarray) -> np.ndarray:
+    """
+    Fills the missing values of each row by linear interpolation between the
+    nearest observed years, repeating the first and last observed values at
+    the ends. Rows without any value are left empty.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values, with shape (n_rows, n_years).
+
+    Returns
+    -------
+    np.ndarray
+        The filled values.
+    """
+    filled = pd.DataFrame(values).T.interpolate(limit_direction="both")
+    return filled.T.to_numpy()
+
+
+class SimilarityEngine:
+    """
+    A class to compare the trajectories of the democracy index of every pair
+    of countries (or of any country-by-year panel) and to cluster them.
+
+    Distances between many pairs are computed in chunks of rows, so the full
+    matrix is only built when it is requested and top-k queries never build
+    it. Missing years are handled as follows:
+
+    - `euclidean`: the distance over the years observed in both series,
+      scaled up to the full number of years.
+    - `correlation`: one minus the Pearson correlation over the years
+      observed in both series.
+    - `dtw`: dynamic time warping between the series with the missing years
+      interpolated, with the warping limited to `band` columns.
+    """
+    def __init__(self, panel: pd.DataFrame = None):
+        """
+        Parameters
+        ----------
+        panel : pd.DataFrame, optional
+            A table with one row per entity and one column per year (see
+            `Data.get_panel`). By default the democracy index panel.
+        """
+        panel = Data().get_panel() if panel is None else panel
+        self.entities = panel.index.to_numpy()
+        self.years = panel.columns.to_numpy()
+        self.values = panel.to_numpy(dtype=float)
+
+        self._mask = (~np.isnan(self.values)).astype(float)
+        self._zeroed = np.where(self._mask > 0, self.values, 0.0)
+        # Factors whose product gives the sums of squared differences over
+        # the common years: x²·m' + m·y'² - 2x·y'
+        self._left = np.hstack([self._zeroed ** 2, self._mask,
+                                -2 * self._zeroed])
+        self._right = np.hstack([self._mask, self._zeroed ** 2,
+                                 self._zeroed])
+        self._filled = _fill_missing(self.values)
+        self._position = pd.Index(self.entities)
+        self._cache = {}
+
+    def _positions(self, entities: list[str]) -> np.ndarray:
+        """
+        Returns the row of each entity.
+
+        Parameters
+        ----------
+        entities : list[str]
+            The entities.
+
+        Returns
+        -------
+        np.ndarray
+            The rows.
+        """
+        positions = self._position.get_indexer(entities)
+        if (positions < 0).any():
+            missing = np.asarray(entities)[positions < 0]
+            raise KeyError(f"Unknown entities: {', '.join(missing)}.")
+        return positions
+
+    def _euclidean(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Computes the Euclidean distances between two sets of rows over the
+        years observed in both, with two matrix products.
+
+        Parameters
+        ----------
+        a : np.ndarray
+            The first rows.
+        b : np.ndarray
+            The second rows.
+
+        Returns
+        -------
+        np.ndarray
+            The distances, with shape (len(a), len(b)).
+        """
+        squares = self._left[a] @ self._right[b].T
+        common = self._mask[a] @ self._mask[b].T
+        np.maximum(squares, 0.0, out=squares)
+        squares *= len(self.years)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            squares /= common
+        squares[common == 0] = np.nan
+        return np.sqrt(squares, out=squares)
+
+    def _correlation(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Computes one minus the Pearson correlation between two sets of rows
+        over the years observed in both. Pairs where a series is constant
+        get a distance of 1.
+
+        Parameters
+        ----------
+        a : np.ndarray
+            The first rows.
+        b : np.ndarray
+            The second rows.
+
+        Returns
+        -------
+        np.ndarray
+            The distances, with shape (len(a), len(b)).
+        """
+        xa, xb = self._zeroed[a], self._zeroed[b]
+        ma, mb = self._mask[a], self._mask[b]
+        n = ma @ mb.T
+        sum_a, sum_b = xa @ mb.T, ma @ xb.T
+        var_a = n * ((xa ** 2) @ mb.T) - sum_a ** 2
+        var_b = n * (ma @ (xb ** 2).T) - sum_b ** 2
+        cov = n * (xa @ xb.T) - sum_a * sum_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.sqrt(var_a * var_b)
+        # Rounding errors make the variance of constant series slightly
+        # different from zero
+        constant = (var_a <= 1e-9 * n ** 2) | (var_b <= 1e-9 * n ** 2)
+        corr = np.where(constant, 0.0, np.clip(corr, -1.0, 1.0))
+        return np.where(n > 1, 1.0 - corr, np.nan)
+
+    def _dtw(self, a: np.ndarray, b: np.ndarray, band: int) -> np.ndarray:
+        """
+        Computes the dynamic time warping distances between two sets of
+        rows, matching each year only with years at most `band` positions
+        away. The recursion runs over the cells of the band, each step
+        updating every pair at once, and only keeps two rows of the cost
+        table.
+
+        Parameters
+        ----------
+        a : np.ndarray
+            The first rows.
+        b : np.ndarray
+            The second rows.
+        band : int
+            The maximum warping, in positions.
+
+        Returns
+        -------
+        np.ndarray
+            The distances, with shape (len(a), len(b)).
+        """
+        xa, xb = self._filled[a], self._filled[b]
+        n_years = len(self.years)
+        previous = np.full((n_years + 1, len(a), len(b)), np.inf)
+        previous[0] = 0.0
+        for i in range(1, n_years + 1):
+            current = np.full_like(previous, np.inf)
+            for j in range(max(1, i - band), min(n_years, i + band) + 1):
+                step = np.minimum(np.minimum(previous[j], current[j - 1]),
+                                  previous[j - 1])
+                current[j] = (xa[:, i - 1, None] - xb[None, :, j - 1]) ** 2 \
+                    + step
+            previous = current
+        return np.sqrt(previous[n_years])
+
+    def _distances(self, a: np.ndarray, b: np.ndarray, metric: str,
+                   band: int) -> np.ndarray:
+        """
+        Computes the distances between two sets of rows.
+
+        Parameters
+        ----------
+        a : np.ndarray
+            The first rows.
+        b : np.ndarray
+            The second rows.
+        metric : str
+            The distance (see `METRICS`).
+        band : int
+            The maximum warping of `dtw`, in positions.
+
+        Returns
+        -------
+        np.ndarray
+            The distances, with shape (len(a), len(b)).
+        """
+        if metric == "euclidean":
+            return self._euclidean(a, b)
+        if metric == "correlation":
+            return self._correlation(a, b)
+        if metric == "dtw":
+            # The recursion keeps two arrays per year, so compare fewer
+            # rows at once
+            step = max(1, CHUNK_SIZE ** 2 // (2 * len(self.years)
+                                              * max(len(b), 1)))
+            return np.vstack([self._dtw(a[i:i + step], b, band)
+                              for i in range(0, len(a), step)])
+        raise ValueError(f"Unknown metric: {metric}.")
+
+    def get_distance_matrix(self, metric: str = "euclidean",
+                            band: int = 2) -> pd.DataFrame:
+        """
+        Returns the distance between every pair of entities. The result is
+        cached for each set of parameters.
+
+        Parameters
+        ----------
+        metric : str, optional
+            The distance (see `METRICS`). By default "euclidean".
+        band : int, optional
+            The maximum warping of `dtw`, in columns (editions of the
+            index). By default 2.
+
+        Returns
+        -------
+        pd.DataFrame
+            The symmetric distance matrix, indexed by entity on both axes.
+            Pairs without enough common years have a NaN distance.
+        """
+        key = ("matrix", metric, band)
+        if key not in self._cache:
+            rows = np.arange(len(self.entities))
+            matrix = np.vstack([
+                self._distances(rows[i:i + CHUNK_SIZE], rows, metric, band)
+                for i in range(0, len(rows), CHUNK_SIZE)])
+            np.fill_diagonal(matrix, 0.0)
+            self._cache[key] = pd.DataFrame(
+                matrix, index=self.entities, columns=self.entities)
+        return self._cache[key]
+
+    def _nearest_chunk(self, queries: np.ndarray, k: int, metric: str,
+                       band: int) -> tuple:
+        """
+        Finds the `k` nearest neighbours of a chunk of rows, comparing them
+        with the candidates one chunk at a time.
+
+        Parameters
+        ----------
+        queries : np.ndarray
+            The rows to query.
+        k : int
+            The number of neighbours.
+        metric : str
+            The distance (see `METRICS`).
+        band : int
+            The maximum warping of `dtw`, in positions.
+
+        Returns
+        -------
+        tuple
+            The distances and rows of the neighbours, each with shape
+            (len(queries), k), sorted by distance.
+        """
+        best_d = np.full((len(queries), 0), np.inf)
+        best_j = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(self.entities), CHUNK_SIZE):
+            candidates = np.arange(start,
+                                   min(start + CHUNK_SIZE, len(self.entities)))
+            d = self._distances(queries, candidates, metric, band)
+            d[queries[:, None] == candidates[None, :]] = np.inf
+            d = np.where(np.isnan(d), np.inf, d)
+            best_d = np.hstack([best_d, d])
+            best_j = np.hstack([best_j, np.broadcast_to(candidates, d.shape)])
+            if best_d.shape[1] > k:
+                keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+                best_d = np.take_along_axis(best_d, keep, axis=1)
+                best_j = np.take_along_axis(best_j, keep, axis=1)
+
+        order = np.argsort(best_d, axis=1, kind="stable")
+        return (np.take_along_axis(best_d, order, axis=1),
+                np.take_along_axis(best_j, order, axis=1))
+
+    def get_nearest(self, entities: list[str] = None, k: int = 5,
+                    metric: str = "euclidean",
+                    band: int = 2) -> pd.DataFrame:
+        """
+        Returns the `k` entities with the most similar trajectories to each
+        of the given ones. Candidates are compared in chunks and only the
+        best `k` of each chunk are kept, so the full distance matrix is
+        never built. Results are cached for each set of parameters.
+
+        Parameters
+        ----------
+        entities : list[str], optional
+            The entities to query. By default all of them.
+        k : int, optional
+            The number of neighbours. By default 5.
+        metric : str, optional
+            The distance (see `METRICS`). By default "euclidean".
+        band : int, optional
+            The maximum warping of `dtw`, in columns (editions of the
+            index). By default 2.
+
+        Returns
+        -------
+        pd.DataFrame
+            The neighbours, with the columns `Country`, `Rank`, `Neighbour`
+            and `Distance`, sorted by country and rank.
+        """
+        key = ("nearest", None if entities is None else tuple(entities), k,
+               metric, band)
+        if key in self._cache:
+            return self._cache[key]
+
+        queries = np.arange(len(self.entities)) if entities is None \
+            else self._positions(entities)
+        k = min(k, len(self.entities) - 1)
+        best_d, best_j = [], []
+        for start in range(0, len(queries), CHUNK_SIZE):
+            d, j = self._nearest_chunk(queries[start:start + CHUNK_SIZE], k,
+                                       metric, band)
+            best_d.append(d)
+            best_j.append(j)
+        best_d, best_j = np.vstack(best_d), np.vstack(best_j)
+
+        result = pd.DataFrame({
+            "Country": np.repeat(self.entities[queries], k),
+            "Rank": np.tile(np.arange(1, k + 1), len(queries)),
+            "Neighbour": self.entities[best_j.ravel()],
+            "Distance": best_d.ravel()})
+        result = result[np.isfinite(result["Distance"])].reset_index(
+            drop=True)
+        self._cache[key] = result
+        return result
+
+    def kmeans(self, n_clusters: int, n_iter: int = 100, seed=None) -> tuple:
+        """
+        Clusters the trajectories with k-means (Lloyd's algorithm with
+        k-means++ initialization) on the series with missing years
+        interpolated. Results are cached when `seed` is an integer.
+
+        Parameters
+        ----------
+        n_clusters : int
+            The number of clusters.
+        n_iter : int, optional
+            The maximum number of iterations. By default 100.
+        seed : int or np.random.Generator, optional
+            The seed or random number generator.
+
+        Returns
+        -------
+        tuple
+            The cluster of each entity, as a `pd.Series`, and the centroids,
+            as a DataFrame with one row per cluster and one column per
+            year.
+        """
+        key = ("kmeans", n_clusters, n_iter, seed)
+        if isinstance(seed, (int, np.integer)) and key in self._cache:
+            return self._cache[key]
+
+        rng = np.random.default_rng(seed)
+        valid = ~np.isnan(self._filled).any(axis=1)
+        x = self._filled[valid]
+        squared_norms = (x ** 2).sum(axis=1)
+
+        def squared_distances(centroids):
+            return np.maximum(
+                squared_norms[:, None] - 2 * x @ centroids.T
+                + (centroids ** 2).sum(axis=1)[None, :], 0.0)
+
+        centroids = x[[rng.integers(len(x))]]
+        for _ in range(1, n_clusters):
+            d = squared_distances(centroids).min(axis=1)
+            p = d / d.sum() if d.sum() > 0 else None
+            centroids = np.vstack([centroids, x[rng.choice(len(x), p=p)]])
+
+        labels = np.full(len(x), -1)
+        for _ in range(n_iter):
+            new_labels = squared_distances(centroids).argmin(axis=1)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, x)
+            counts = np.bincount(labels, minlength=n_clusters)[:, None]
+            centroids = np.where(counts > 0, sums / np.maximum(counts, 1),
+                                 centroids)
+
+        clusters = np.full(len(self.entities), -1)
+        clusters[valid] = labels
+        result = (pd.Series(clusters, index=self.entities, name="Cluster"),
+                  pd.DataFrame(centroids, columns=self.years))
+        if isinstance(seed, (int, np.integer)):
+            self._cache[key] = result
+        return result
+
+    def hierarchical(self, n_clusters: int, metric: str = "euclidean",
+                     method: str = "average", band: int = 2) -> pd.Series:
+        """
+        Clusters the trajectories by agglomerative hierarchical clustering
+        on the distance matrix. Pairs without a distance are treated as far
+        apart. Results are cached for each set of
+        parameters.
+
+        Parameters
+        ----------
+        n_clusters : int
+            The number of clusters.
+        metric : str, optional
+            The distance (see `METRICS`). By default "euclidean".
+        method : str, optional
+            The linkage method ("single", "complete", "average", ...). By
+            default "average".
+        band : int, optional
+            The maximum warping of `dtw`, in columns (editions of the
+            index). By default 2.
+
+        Returns
+        -------
+        pd.Series
+            The cluster of each entity, numbered from 0.
+        """
+        key = ("hierarchical", n_clusters, metric, method, band)
+        if key not in self._cache:
+            matrix = self.get_distance_matrix(metric, band).to_numpy()
+            matrix = np.where(np.isnan(matrix), np.nanmax(matrix), matrix)
+            tree = linkage(squareform((matrix + matrix.T) / 2,
+                                      checks=False), method=method)
+            clusters = fcluster(tree, n_clusters, criterion="maxclust") - 1
+            self._cache[key] = pd.Series(clusters, index=self.entities,
+                                         name="Cluster")
+        return self._cache[key]
+
+
+@lru_cache(maxsize=None)
+def get_similarity_engine() -> SimilarityEngine:
+    """
+    Returns the similarity engine for the democracy index panel, built once
+    per session.
+
+    Returns
+    -------
+    SimilarityEngine
+        The similarity engine.
+    """
+    return SimilarityEngine()
@@ -0,0 +1,209 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from data import Data, get_name_index
+from geometry import DETAIL_LEVELS, get_topology
+
+
+class SpatialIndex:
+    """
+    A class to map geographic points to countries with an STRtree over the
+    world countries geometry (see `geometry.Topology`), the same one drawn
+    in the maps. All queries take arrays of longitudes and latitudes (in
+    degrees) and run in a single batched call.
+    """
+    def __init__(self, detail: str = "high"):
+        """
+        Parameters
+        ----------
+        detail : str, optional
+            The level of detail of the geometry (see
+            `geometry.DETAIL_LEVELS`). By default "high".
+        """
+        topology = get_topology()
+        self.geometries = topology.to_geometries(DETAIL_LEVELS[detail])
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+        # Nearest-country queries run against the individual border
+        # segments, which are much cheaper to measure than whole polygons
+        parts, part_rows = shapely.get_parts(
+            shapely.boundary(self.geometries), return_index=True)
+        coords, coord_parts = shapely.get_coordinates(
+            parts, return_index=True)
+        same_part = coord_parts[1:] == coord_parts[:-1]
+        self.segment_rows = part_rows[coord_parts[:-1][same_part]]
+        self.segment_tree = shapely.STRtree(shapely.linestrings(
+            np.stack([coords[:-1][same_part], coords[1:][same_part]],
+                     axis=1)))
+
+        data = Data()
+        name_index = get_name_index()
+        self.countries = name_index.countries
+        self.country_codes = pd.Index(self.countries).get_indexer(
+            topology.properties["Country"])
+
+        panel = data.get_panel().reindex(self.countries)
+        self.years = panel.columns.to_numpy()
+        self.values = panel.to_numpy()
+        self.regions = data.df.groupby("Country")["Region"].first().reindex(
+            self.countries).to_numpy(dtype=object)
+
+    @staticmethod
+    def _points(lon, lat) -> np.ndarray:
+        """
+        Builds an array of shapely points.
+
+        Parameters
+        ----------
+        lon : array-like
+            The longitudes.
+        lat : array-like
+            The latitudes.
+
+        Returns
+        -------
+        np.ndarray
+            The points.
+        """
+        return shapely.points(np.asarray(lon, dtype=float),
+                              np.asarray(lat, dtype=float))
+
+    def locate(self, lon, lat) -> np.ndarray:
+        """
+        Returns the number of the geometry that contains each point.
+
+        Parameters
+        ----------
+        lon : array-like
+            The longitudes.
+        lat : array-like
+            The latitudes.
+
+        Returns
+        -------
+        np.ndarray
+            The row numbers, with -1 for points outside every polygon.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        # The tree only compares bounding boxes; the exact test then runs on
+        # the candidate pairs in one vectorized call
+        point_idx, geom_idx = self.tree.query(self._points(lon, lat))
+        inside = shapely.intersects_xy(self.geometries[geom_idx],
+                                       lon[point_idx], lat[point_idx])
+        point_idx, geom_idx = point_idx[inside], geom_idx[inside]
+        rows = np.full(len(lon), -1, dtype=np.int64)
+        # Points on a shared border match two polygons; keep the first one
+        rows[point_idx[::-1]] = geom_idx[::-1]
+        return rows
+
+    def nearest(self, lon, lat, max_distance: float = None) -> tuple:
+        """
+        Returns the number of the geometry whose border is nearest to
+        each point, together with the distance to that border. This is meant
+        for points that fall outside every polygon (see `locate`).
+
+        Parameters
+        ----------
+        lon : array-like
+            The longitudes.
+        lat : array-like
+            The latitudes.
+        max_distance : float, optional
+            The maximum search distance, in degrees. Points farther than this
+            from every polygon get the row -1. By default there is no limit.
+
+        Returns
+        -------
+        tuple
+            The row numbers and the distances, in degrees.
+        """
+        points = self._points(lon, lat)
+        (point_idx, segment_idx), distances = \
+            self.segment_tree.query_nearest(
+                points, max_distance=max_distance, return_distance=True,
+                all_matches=False)
+        rows = np.full(len(points), -1, dtype=np.int64)
+        rows[point_idx] = self.segment_rows[segment_idx]
+        dist = np.full(len(points), np.nan)
+        dist[point_idx] = distances
+        return rows, dist
+
+    def annotate(self, lon, lat, year: int, snap: bool = True,
+                 max_distance: float = None) -> pd.DataFrame:
+        """
+        Returns the country, region and democracy index for each point.
+        Repeated coordinates are only looked up once, and points with
+        missing or infinite coordinates get no country.
+
+        Parameters
+        ----------
+        lon : array-like
+            The longitudes.
+        lat : array-like
+            The latitudes.
+        year : int
+            The year of the democracy index.
+        snap : bool, optional
+            If True (the default), points that fall outside every polygon
+            (e.g. at sea) are assigned to the nearest country.
+        max_distance : float, optional
+            The maximum snapping distance, in degrees. By default there is no
+            limit.
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame with the columns `Country`, `Region`,
+            `DemocracyIndex` and `Distance` (in degrees, zero for points
+            inside a country), one row per point.
+        """
+        year_idx = np.flatnonzero(self.years == year)
+        if len(year_idx) == 0:
+            raise ValueError(f"No data for year {year}.")
+
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        finite = np.isfinite(lon) & np.isfinite(lat)
+        points = np.full(len(lon), np.nan, dtype=complex)
+        points[finite] = lon[finite] + 1j * lat[finite]
+        inverse, xy = pd.factorize(points)
+        rows = self.locate(xy.real, xy.imag)
+        distance = np.where(rows >= 0, 0.0, np.nan)
+        if snap:
+            outside = np.flatnonzero(rows < 0)
+            if len(outside):
+                rows[outside], distance[outside] = self.nearest(
+                    xy.real[outside], xy.imag[outside],
+                    max_distance=max_distance)
+        # Missing points have the code -1 and take the appended result
+        rows = np.append(rows, -1)[inverse]
+        distance = np.append(distance, np.nan)[inverse]
+
+        codes = np.where(rows >= 0, self.country_codes[rows], -1)
+        values = np.append(self.values[:, year_idx[0]], np.nan)
+        countries = np.append(self.countries, None)
+        regions = np.append(self.regions, None)
+        return pd.DataFrame({
+            "Country": countries[codes],
+            "Region": regions[codes],
+            "DemocracyIndex": values[codes],
+            "Distance": distance})
+
+
+@lru_cache(maxsize=None)
+def get_spatial_index() -> SpatialIndex:
+    """
+    Returns the spatial index of the world countries, built once per
+    session.
+
+    Returns
+    -------
+    SpatialIndex
+        The spatial index.
+    """
+    return SpatialIndex()
@@ -0,0 +1,537 @@
+import glob
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+import matplotlib.colors as mcolors
+from matplotlib import font_manager, style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+from matplotlib.patches import Rectangle
+
+from colors import Colors
+from config import Config
+from data import Data, get_yearly_geographic_data
+from data import get_index_change_geographic_data, get_migration_matrix
+from geometry import get_geojson
+from labels import place_series_labels, spread_labels
+
+
+STYLE = "styles/line.mplstyle"
+FONTS = "fonts/*.ttf"
+FONT_FAMILY = "Roboto"
+
+# The latitude range shown on the maps, as in the Plotly figures
+LATITUDE_RANGE = (-60, 90)
+
+SOURCE = "Source(s): The Economist/Wikipedia"
+
+# The style is applied through the global `rcParams`, which Matplotlib also
+# reads when drawing, so building and saving figures from several threads
+# (e.g. in the export pipeline) runs one at a time
+_LOCK = threading.RLock()
+
+
+@lru_cache(maxsize=None)
+def _register_fonts() -> None:
+    """
+    Adds the fonts bundled with the project to Matplotlib, once per session.
+    """
+    for path in sorted(glob.glob(FONTS)):
+        font_manager.fontManager.addfont(path)
+
+
+@contextmanager
+def _style():
+    """
+    Applies the project style with the bundled fonts. Figures must be built
+    inside this context, since Matplotlib reads the style when each element
+    is created. Other threads cannot build or write static figures while it
+    is active.
+    """
+    with _LOCK:
+        _register_fonts()
+        with style.context([STYLE, {"font.family": FONT_FAMILY}]):
+            yield
+
+
+def _new_figure(width: float = 5.0, height: float = 3.5) -> Figure:
+    """
+    Creates a figure attached to an Agg canvas, without going through
+    `pyplot`, so that figures can be built and saved from any thread.
+
+    Parameters
+    ----------
+    width : float, optional
+        The width of the figure, in inches. By default 5.
+    height : float, optional
+        The height of the figure, in inches. By default 3.5.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def write_figure(fig: Figure, name: str, formats: tuple = ("png",)) -> None:
+    """
+    Writes a figure to `reports/figures/<name>.png` with the resolution and
+    margins of the project style. Figures are written one at a time, and
+    not while another one is being built.
+
+    Parameters
+    ----------
+    fig : Figure
+        The figure to write.
+    name : str
+        The output file name, without extension.
+    formats : tuple, optional
+        The formats to write. Only "png" is supported.
+    """
+    unsupported = set(formats) - {"png"}
+    if unsupported:
+        raise ValueError(
+            f"Unsupported format(s) for static figures: {unsupported}.")
+    params = mpl.rc_params_from_file(STYLE, use_default_template=False)
+    with _LOCK:
+        fig.savefig(f"reports/figures/{name}.png",
+                    dpi=params["savefig.dpi"],
+                    bbox_inches=params["savefig.bbox"],
+                    pad_inches=params["savefig.pad_inches"],
+                    facecolor=params["savefig.facecolor"])
+
+
+@lru_cache(maxsize=None)
+def get_country_paths(detail: str = "medium") -> tuple:
+    """
+    Returns the outline of each country as a Matplotlib path, built once per
+    level of detail from the cached GeoJSON (see `geometry.get_geojson`).
+    The maps use the equirectangular projection, so the longitudes and
+    latitudes are used as they are.
+
+    Parameters
+    ----------
+    detail : str, optional
+        The level of detail (see `geometry.DETAIL_LEVELS`). By default
+        "medium".
+
+    Returns
+    -------
+    tuple
+        The `ADM0_A3` code of each country, as a `pd.Index`, and the list
+        of paths in the same order. Antarctica is left out.
+    """
+    ids, paths = [], []
+    for feature in get_geojson(detail)["features"]:
+        if feature["id"] == "ATA":
+            continue
+        rings = [np.asarray(ring, dtype=float)
+                 for polygon in feature["geometry"]["coordinates"]
+                 for ring in polygon]
+        codes = np.full(sum(len(ring) for ring in rings), Path.LINETO,
+                        dtype=Path.code_type)
+        starts = np.cumsum([0] + [len(ring) for ring in rings])
+        codes[starts[:-1]] = Path.MOVETO
+        codes[starts[1:] - 1] = Path.CLOSEPOLY
+        ids.append(feature["id"])
+        paths.append(Path(np.vstack(rings), codes, readonly=True))
+    return pd.Index(ids), paths
+
+
+def _add_title(fig: Figure, title: str, subtitle: str = None) -> None:
+    """
+    Adds the title, subtitle and source of a figure.
+
+    Parameters
+    ----------
+    fig : Figure
+        The figure.
+    title : str
+        The title.
+    subtitle : str, optional
+        The subtitle.
+    """
+    fig.text(0.02, 0.97, title, fontsize=9, fontweight="bold",
+             va="top", ha="left")
+    if subtitle is not None:
+        fig.text(0.02, 0.91, subtitle, fontsize=6, va="top", ha="left")
+    fig.text(0.02, 0.01, SOURCE, fontsize=5, va="bottom", ha="left")
+
+
+def _setup_time_series_axes(fig: Figure):
+    """
+    Adds the axes of a time-series chart, with the ranges and ticks of the
+    Plotly charts.
+
+    Parameters
+    ----------
+    fig : Figure
+        The figure.
+
+    Returns
+    -------
+    Axes
+        The axes.
+    """
+    ax = fig.add_axes([0.05, 0.1, 0.92, 0.7])
+    ax.set_xlim(2005.9, 2024.1)
+    ax.set_ylim(0, 10.1)
+    ax.set_xticks(range(2007, 2024, 2))
+    ax.set_yticks(range(11))
+    ax.set_axisbelow(True)
+    ax.text(0.001, 9.8, "MORE DEMOCRATIC", fontsize=5, fontweight="bold",
+            va="center", transform=ax.get_yaxis_transform())
+    ax.text(0.001, 0.2, "LESS DEMOCRATIC", fontsize=5, fontweight="bold",
+            va="center", transform=ax.get_yaxis_transform())
+    return ax
+
+
+def plot_evolution_regions(write: bool = True) -> Figure:
+    """
+    Plots the evolution of the Democracy Index by region from 2006 to 2024.
+
+    Parameters
+    ----------
+    write : bool, optional
+        If True (the default), write the figure to `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    config = Config()
+    panel = Data().get_region_averages().pivot(
+        index="Region", columns="Year", values="DemocracyIndex")
+    regions = panel.index.astype(str)
+
+    with _style():
+        fig = _new_figure()
+        ax = _setup_time_series_axes(fig)
+        label_y = spread_labels(panel.iloc[:, 0].to_numpy() + 0.25,
+                                min_gap=0.35, lower=0.5, upper=9.5)
+        for region, values, y in zip(regions, panel.to_numpy(), label_y):
+            color = config.region_colors[region]
+            ax.plot(panel.columns, values, color=color, marker="o",
+                    markersize=2)
+            ax.text(0.001, y, region, color=color, fontsize=5,
+                    fontweight="bold", va="center",
+                    transform=ax.get_yaxis_transform())
+        _add_title(fig, "The Economist Democracy Index, 2006 - 2024",
+                   "This chart shows the evolution of The Economist "
+                   "Democracy Index between 2006 and 2024, averaged\n"
+                   "by region.")
+
+    if write:
+        write_figure(fig, "time_series_by_region")
+    return fig
+
+
+def plot_evolution_countries(countries: list[str] = None,
+                             write: bool = True) -> Figure:
+    """
+    Plots the evolution of the Democracy Index for selected countries from
+    2006 to 2024, with automatically placed labels.
+
+    Parameters
+    ----------
+    countries : list[str], optional
+        The countries to plot. By default, a selection of six countries.
+    write : bool, optional
+        If True (the default), write the figure to `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    colors = Colors()
+    if countries is None:
+        countries = ["Argentina", "Mali", "Bhutan", "Afghanistan", "Norway",
+                     "Nicaragua"]
+    line_colors = [colors.BLUE, colors.ORANGE, colors.GREEN, colors.RED,
+                   colors.PURPLE, colors.BROWN, colors.PINK]
+    panel = Data().get_panel().loc[countries]
+    label_positions = place_series_labels(
+        panel.columns, panel.to_numpy(), countries, char_width=0.2,
+        height=0.35, x_range=(2005.9, 2024.1), y_range=(0, 10.1))
+
+    with _style():
+        fig = _new_figure()
+        ax = _setup_time_series_axes(fig)
+        for i, country in enumerate(countries):
+            color = line_colors[i % len(line_colors)]
+            series = panel.loc[country].dropna()
+            ax.plot(series.index, series.to_numpy(), color=color,
+                    marker="o", markersize=2)
+            ax.text(*label_positions[i], country, color=color, fontsize=5,
+                    fontweight="bold", ha="center", va="center")
+        _add_title(fig, "The Economist Democracy Index, 2006 - 2024",
+                   "This chart shows the evolution of The Economist "
+                   "Democracy Index between 2006 and 2024 for\nselected "
+                   "countries.")
+
+    if write:
+        write_figure(fig, "time_series_by_country")
+    return fig
+
+
+def _plot_map(df: pd.DataFrame, values: str, cmap, norm, detail: str,
+              colorbar_ticks: list = None) -> Figure:
+    """
+    Plots a choropleth world map from the cached country paths. Countries
+    without data are drawn in light gray.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The geographic DataFrame, with an `ADM0_A3` column.
+    values : str
+        The column to color the countries by.
+    cmap : Colormap
+        The colormap.
+    norm : Normalize
+        The normalization of the values.
+    detail : str
+        The level of detail of the geometry.
+    colorbar_ticks : list, optional
+        The ticks of the horizontal colorbar. If None, no colorbar is drawn.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    colors = Colors()
+    ids, paths = get_country_paths(detail)
+    positions = ids.get_indexer(df["ADM0_A3"])
+    found = positions >= 0
+
+    face_colors = np.tile(mcolors.to_rgba(colors.LIGHT_GRAY), (len(ids), 1))
+    face_colors[positions[found]] = cmap(norm(
+        df[values].to_numpy(dtype=float)[found]))
+
+    fig = _new_figure(5.0, 2.8)
+    ax = fig.add_axes([0.0, 0.1, 1.0, 0.75])
+    ax.add_collection(PathCollection(
+        paths, facecolors=face_colors, edgecolors="white", linewidths=0.2))
+    ax.set_xlim(-180, 180)
+    ax.set_ylim(*LATITUDE_RANGE)
+    ax.set_aspect("equal")
+    ax.set_axis_off()
+
+    if colorbar_ticks is not None:
+        cax = fig.add_axes([0.05, 0.1, 0.9, 0.02])
+        colorbar = fig.colorbar(mpl.cm.ScalarMappable(norm=norm, cmap=cmap),
+                                cax=cax, orientation="horizontal",
+                                ticks=colorbar_ticks)
+        colorbar.outline.set_visible(False)
+        cax.tick_params(length=0, labelsize=5)
+        cax.grid(False)
+    return fig
+
+
+def plot_world_map_index(year: int, detail: str = "medium",
+                         write: bool = True) -> Figure:
+    """
+    Plots a world map of the Democracy Index for a given year.
+
+    Parameters
+    ----------
+    year : int
+        The year for which to plot the map.
+    detail : str, optional
+        The level of detail of the geometry (see `geometry.DETAIL_LEVELS`).
+        By default "medium".
+    write : bool, optional
+        If True (the default), write the figure to `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    df = get_yearly_geographic_data(year=year)
+    with _style():
+        fig = _plot_map(df, "DemocracyIndex", mpl.colormaps["viridis"],
+                        mcolors.Normalize(0, 10), detail,
+                        [0, 2, 4, 6, 8, 10])
+        _add_title(fig, f"The Economist Democracy Index Map, {year}",
+                   "This chart shows a world map of the Economist Democracy "
+                   f"Index in {year}.")
+
+    if write:
+        write_figure(fig, f"map_index_{year}")
+    return fig
+
+
+def plot_world_map_index_change(start_year: int, end_year: int,
+                                detail: str = "medium",
+                                write: bool = True) -> Figure:
+    """
+    Plots a world map of the change in the Democracy Index between two years.
+
+    Parameters
+    ----------
+    start_year : int
+        The starting year for the change calculation.
+    end_year : int
+        The ending year for the change calculation.
+    detail : str, optional
+        The level of detail of the geometry (see `geometry.DETAIL_LEVELS`).
+        By default "medium".
+    write : bool, optional
+        If True (the default), write the figure to `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    colors = Colors()
+    df = get_index_change_geographic_data(start_year, end_year)
+    with _style():
+        fig = _plot_map(df, "IndexChange", colors.colormaps["RdWtGr"],
+                        mcolors.Normalize(-4, 4), detail,
+                        [-4, -3, -2, -1, 0, 1, 2, 3, 4])
+        _add_title(fig, "The Economist Democracy Index Variation Map, "
+                   f"{start_year} - {end_year}",
+                   "This chart shows a world map of the Economist Democracy "
+                   "Index, coloured by the change between\n"
+                   f"{start_year} and {end_year}.")
+
+    if write:
+        write_figure(fig, f"map_index_change_{start_year}_to_{end_year}")
+    return fig
+
+
+def plot_regions(detail: str = "medium", write: bool = True) -> Figure:
+    """
+    Plots a world map of the regions defined in the project.
+
+    Parameters
+    ----------
+    detail : str, optional
+        The level of detail of the geometry (see `geometry.DETAIL_LEVELS`).
+        By default "medium".
+    write : bool, optional
+        If True (the default), write the figure to `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    config = Config()
+    df = get_yearly_geographic_data(year=2006)
+    regions = list(config.region_colors.keys())
+    df["RegionCode"] = df["Region"].map(
+        {region: i for i, region in enumerate(regions)})
+
+    with _style():
+        fig = _plot_map(
+            df, "RegionCode",
+            mcolors.ListedColormap(list(config.region_colors.values())),
+            mcolors.Normalize(-0.5, len(regions) - 0.5), detail)
+        for i, region in enumerate(regions):
+            fig.text(0.02, 0.08 + i * 0.035, region, fontsize=5,
+                     fontweight="bold", color=config.region_colors[region],
+                     va="center")
+        _add_title(fig, "World Regions",
+                   "This chart shows a world map of the different regions.")
+
+    if write:
+        write_figure(fig, "map_regions")
+    return fig
+
+
+def plot_regime_migration(start_year: int, end_year: int,
+                          write: bool = True) -> Figure:
+    """
+    Plots a table of regime type changes between two years.
+
+    Parameters
+    ----------
+    start_year : int
+        The starting year for the regime change calculation.
+    end_year : int
+        The ending year for the regime change calculation.
+    write : bool, optional
+        If True (the default), write the figure to `reports/figures`.
+
+    Returns
+    -------
+    Figure
+        The figure.
+    """
+    m = get_migration_matrix(start_year, end_year)
+    labels = ["Authoritarian\nRegimes", "Hybrid\nRegimes",
+              "Flawed\nDemocracies", "Full\nDemocracies", "Total"]
+
+    # The same cell colors as the Plotly figure: improvements in green,
+    # setbacks in red and totals in gray
+    greens, reds = mpl.colormaps["Greens"], mpl.colormaps["Reds"]
+    shades = {1: 0.25, 2: 0.45, 3: 0.65}
+    n = m.shape[0]
+    steps = np.subtract.outer(np.arange(n), np.arange(n))
+
+    with _style():
+        fig = _new_figure(3.5, 3.5)
+        ax = fig.add_axes([0.25, 0.05, 0.7, 0.65])
+        for r in range(n):
+            for c in range(n):
+                if r == n - 1 or c == n - 1:
+                    color = "gainsboro" if r != c else "white"
+                elif steps[r, c] < 0:
+                    color = greens(shades[-steps[r, c]])
+                elif steps[r, c] > 0:
+                    color = reds(shades[steps[r, c]])
+                else:
+                    color = "white"
+                ax.add_patch(Rectangle((c, n - r - 1), 1, 1, facecolor=color,
+                                       edgecolor="white", linewidth=2))
+                if not np.isnan(m[r, c]):
+                    ax.text(c + 0.5, n - r - 0.5, str(int(m[r, c])),
+                            fontsize=7, fontweight="bold", ha="center",
+                            va="center")
+        ax.set_xlim(0, n)
+        ax.set_ylim(0, n)
+        ax.set_aspect("equal")
+        ax.set_axis_off()
+        for i, label in enumerate(labels):
+            ax.text(i + 0.5, n + 0.1, label, fontsize=5, rotation=90,
+                    ha="center", va="bottom")
+            ax.text(-0.1, n - i - 0.5, label, fontsize=5, ha="right",
+                    va="center")
+        ax.text(n / 2, n + 1.2, str(end_year), fontsize=6, fontweight="bold",
+                ha="center", va="bottom")
+        ax.text(-1.35, n / 2, str(start_year), fontsize=6, fontweight="bold",
+                rotation=90, ha="center", va="center")
+        fig.text(0.02, 0.99, "Changes in Regime Types, "
+                 f"{start_year} - {end_year}", fontsize=8, fontweight="bold",
+                 va="top", ha="left")
+        fig.text(0.02, 0.0, SOURCE, fontsize=5, va="bottom", ha="left")
+
+    if write:
+        write_figure(fig, "regime_migration")
+    return fig
+
+
+if __name__ == "__main__":
+    os.makedirs("reports/figures", exist_ok=True)
+    plot_evolution_regions()
+    plot_evolution_countries()
+    plot_world_map_index(2024)
+    plot_world_map_index_change(2006, 2024)
+    plot_regions()
+    plot_regime_migration(2006, 2024)
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_DIR = "data/interim/validation"
+
+# Bump when the checks change, so that cached results are not reused
+VERSION = 1
+
+ISSUE_COLUMNS = ["Severity", "Check", "Country", "Column", "Message"]
+
+
+class ValidationError(ValueError):
+    """
+    Raised when the democracy index table fails validation. The `issues`
+    attribute holds every problem found (see `Schema.validate`).
+    """
+    def __init__(self, issues: pd.DataFrame):
+        self.issues = issues
+        errors = issues[issues["Severity"] == "error"]
+        lines = [f"- [{row.Check}] {row.Message}"
+                 for row in errors.head(20).itertuples()]
+        if len(errors) > 20:
+            lines.append(f"- ... and {len(errors) - 20} more.")
+        super().__init__(
+            f"The democracy index table has {len(errors)} error(s):\n"
+            + "\n".join(lines))
+
+
+class Schema:
+    """
+    The expected shape of the raw democracy index table (one row per
+    country, one column per year) and the checks that it must pass. Every
+    check runs on the whole table at once.
+    """
+    def __init__(self, regions: list[str], regime_types: list[str],
+                 thresholds: list[float], score_range: tuple = (0.0, 10.0),
+                 id_columns: tuple = ("Region", "Country", "RegimeType")):
+        """
+        Parameters
+        ----------
+        regions : list[str]
+            The known regions (the keys of `Config.region_colors`).
+        regime_types : list[str]
+            The regime types, ordered from least to most democratic.
+        thresholds : list[float]
+            The scores that separate consecutive regime types.
+        score_range : tuple, optional
+            The lowest and highest valid scores. By default (0, 10).
+        id_columns : tuple, optional
+            The columns that describe each country.
+        """
+        self.regions = list(regions)
+        self.regime_types = list(regime_types)
+        self.thresholds = list(thresholds)
+        self.score_range = tuple(score_range)
+        self.id_columns = list(id_columns)
+
+    def fingerprint(self) -> str:
+        """
+        Returns a text that identifies the schema, used as part of the cache
+        key of validation results.
+
+        Returns
+        -------
+        str
+            The fingerprint.
+        """
+        return json.dumps([VERSION, self.regions, self.regime_types,
+                           self.thresholds, self.score_range,
+                           self.id_columns])
+
+    def validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Checks the raw table. Errors are problems that would break the
+        project (e.g. a region without a color); warnings are suspicious but
+        usable data (e.g. a missing score in the middle of a series).
+
+        The checks are: the expected columns, scores that are numeric and
+        within the valid range, unique countries, missing labels and scores,
+        regime types consistent with the latest scores and regions covered
+        by the configuration.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The raw table, as read from the CSV file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The issues found, with the columns `Severity`, `Check`,
+            `Country`, `Column` and `Message`. Empty if the table is valid.
+        """
+        issues = []
+
+        def add(severity, check, countries, columns, messages):
+            n = len(messages)
+            issues.append(pd.DataFrame({
+                "Severity": [severity] * n, "Check": [check] * n,
+                "Country": np.broadcast_to(countries, n),
+                "Column": np.broadcast_to(columns, n),
+                "Message": messages}))
+
+        missing = [c for c in self.id_columns if c not in df.columns]
+        year_columns = [c for c in df.columns if str(c).isdigit()]
+        if missing or not year_columns:
+            add("error", "schema", None, None,
+                [f"Missing column {c}." for c in missing]
+                + ([] if year_columns else ["No year columns."]))
+            return _concat(issues)
+
+        countries = df["Country"].astype(str).to_numpy()
+        scores = df[year_columns].apply(pd.to_numeric, errors="coerce")
+        values = scores.to_numpy(dtype=float)
+        years = np.array(year_columns)
+
+        # Non-numeric and out-of-range scores
+        rows, cols = np.nonzero(scores.isna().to_numpy()
+                                & df[year_columns].notna().to_numpy())
+        add("error", "type", countries[rows], years[cols],
+            [f"Non-numeric score for {c} in {y}."
+             for c, y in zip(countries[rows], years[cols])])
+        low, high = self.score_range
+        with np.errstate(invalid="ignore"):
+            rows, cols = np.nonzero((values < low) | (values > high))
+        add("error", "range", countries[rows], years[cols],
+            [f"Score {v} for {c} in {y} is outside [{low}, {high}]."
+             for v, c, y in zip(values[rows, cols], countries[rows],
+                                years[cols])])
+
+        # Uniqueness of countries and years
+        duplicated = df["Country"].duplicated(keep="first").to_numpy()
+        add("error", "unique", countries[duplicated], "Country",
+            [f"Duplicate country {c}." for c in countries[duplicated]])
+        duplicated_years = pd.Index(years).duplicated()
+        add("error", "unique", None, years[duplicated_years],
+            [f"Duplicate year {y}." for y in years[duplicated_years]])
+
+        # Missing labels and scores
+        labels = df[self.id_columns]
+        rows, cols = np.nonzero(labels.isna().to_numpy())
+        add("error", "missing", countries[rows],
+            np.array(self.id_columns)[cols],
+            [f"Missing {self.id_columns[j]} in row {i}."
+             for i, j in zip(rows, cols)])
+        nan = np.isnan(values)
+        empty = nan.all(axis=1)
+        add("error", "missing", countries[empty], None,
+            [f"No scores for {c}." for c in countries[empty]])
+        rows, cols = np.nonzero(df[year_columns].isna().to_numpy()
+                                & ~empty[:, None])
+        add("warning", "missing", countries[rows], years[cols],
+            [f"Missing score for {c} in {y}."
+             for c, y in zip(countries[rows], years[cols])])
+
+        # Regime types must match the scores of the latest year
+        latest = years[np.argmax(years.astype(int))]
+        latest_values = scores[latest].to_numpy(dtype=float)
+        expected = np.digitize(latest_values, self.thresholds)
+        regime_types = df["RegimeType"].astype(str).to_numpy()
+        actual = pd.Index(self.regime_types).get_indexer(regime_types)
+        unknown = (actual < 0) & df["RegimeType"].notna().to_numpy()
+        add("error", "regime", countries[unknown], "RegimeType",
+            [f"Unknown regime type {r} for {c}."
+             for r, c in zip(regime_types[unknown], countries[unknown])])
+        mismatch = (actual >= 0) & ~np.isnan(latest_values) \
+            & (actual != expected)
+        add("error", "regime", countries[mismatch], "RegimeType",
+            [f"{c} is labelled {r} but scores {v} in {latest}."
+             for c, r, v in zip(countries[mismatch], regime_types[mismatch],
+                                latest_values[mismatch])])
+
+        # Every region must have a color, and every color a country
+        regions = df["Region"].dropna().astype(str)
+        unknown = sorted(set(regions) - set(self.regions))
+        add("error", "region", None, "Region",
+            [f"Region {r} is not in the configuration." for r in unknown])
+        uncovered = [r for r in self.regions if r not in set(regions)]
+        add("warning", "region", None, "Region",
+            [f"Region {r} has no countries." for r in uncovered])
+
+        return _concat(issues)
+
+
+def _concat(issues: list) -> pd.DataFrame:
+    """
+    Joins the issues found by each check.
+
+    Parameters
+    ----------
+    issues : list
+        The DataFrames of issues.
+
+    Returns
+    -------
+    pd.DataFrame
+        The issues, with the columns of `ISSUE_COLUMNS`.
+    """
+    issues = [df for df in issues if not df.empty]
+    if not issues:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    return pd.concat(issues, ignore_index=True)[ISSUE_COLUMNS]
+
+
+_results = {}
+
+
+def validate(df: pd.DataFrame, schema: Schema, content: bytes = None,
+             raise_errors: bool = True) -> pd.DataFrame:
+    """
+    Validates the raw table, reusing the result of a previous validation of
+    the same input. Results are cached in memory and in `CACHE_DIR`, keyed
+    by a hash of the input and the schema. Warnings are reported with
+    `warnings.warn` the first time an input is validated.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The raw table.
+    schema : Schema
+        The schema to check against.
+    content : bytes, optional
+        The contents of the file the table was read from, which are cheaper
+        to hash than the table. By default the table itself is hashed.
+    raise_errors : bool, optional
+        If True (the default), raise a `ValidationError` if there are
+        errors.
+
+    Returns
+    -------
+    pd.DataFrame
+        The issues found (see `Schema.validate`).
+    """
+    digest = hashlib.sha256(schema.fingerprint().encode("utf-8"))
+    if content is None:
+        digest.update(df.to_csv(index=False).encode("utf-8"))
+    else:
+        digest.update(content)
+    key = digest.hexdigest()
+
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    if key not in _results:
+        if os.path.exists(path):
+            issues = pd.read_json(path, orient="records", dtype=False)
+            issues = issues.reindex(columns=ISSUE_COLUMNS)
+        else:
+            issues = schema.validate(df)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            issues.to_json(path, orient="records")
+            for message in issues.loc[issues["Severity"] == "warning",
+                                      "Message"]:
+                warnings.warn(message)
+        _results[key] = issues
+    issues = _results[key]
+
+    if raise_errors and (issues["Severity"] == "error").any():
+        raise ValidationError(issues)
+    return issues
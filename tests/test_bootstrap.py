@@ -0,0 +1,31 @@
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, "src")
+from bootstrap import BootstrapEngine  # noqa: E402
+from data import Data  # noqa: E402
+
+
+class TestBootstrapEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = Data()
+
+    def test_seed(self):
+        first = BootstrapEngine(self.data).get_bands(500, seed=42)
+        second = BootstrapEngine(self.data).get_bands(500, seed=42)
+        for a, b in zip(first, second):
+            pd.testing.assert_frame_equal(a, b)
+
+    def test_bands(self):
+        for df in BootstrapEngine(self.data).get_bands(2000, seed=0):
+            self.assertTrue((df["Low"] <= df["DemocracyIndex"]).all())
+            self.assertTrue((df["DemocracyIndex"] <= df["High"]).all())
+            self.assertTrue((df["Low"] <= df["Median"]).all())
+            self.assertTrue((df["Median"] <= df["High"]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
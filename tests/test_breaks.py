@@ -0,0 +1,30 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, "src")
+from breaks import segment  # noqa: E402
+
+
+class TestSegment(unittest.TestCase):
+    def test_segment(self):
+        rng = np.random.default_rng(0)
+        values = np.array([
+            [5.0] * 8 + [2.0] * 9,
+            [3.0] * 5 + [6.0] * 6 + [8.5] * 6,
+            [7.0] * 17])
+        values += rng.normal(0.0, 0.05, values.shape)
+        starts = segment(values)
+        self.assertListEqual(list(np.flatnonzero(starts[0])), [8])
+        self.assertListEqual(list(np.flatnonzero(starts[1])), [5, 11])
+        self.assertFalse(starts[2].any())
+
+    def test_min_shift(self):
+        values = np.array([[5.0] * 8 + [5.3] * 9])
+        self.assertFalse(segment(values, min_shift=0.5).any())
+        self.assertTrue(segment(values, min_shift=0.2).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, "src")
+from cube import ALL, Cube  # noqa: E402
+from data import Data, get_yearly_data  # noqa: E402
+
+
+class TestCube(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = Data()
+        cls.cube = Cube(cls.data)
+
+    def test_region_averages(self):
+        expected = self.data.get_region_averages().pivot(
+            index="Region", columns="Year", values="DemocracyIndex")
+        table = self.cube.get_table("Region", "Year")
+        np.testing.assert_allclose(
+            table.drop(index=ALL, columns=ALL).to_numpy(),
+            expected.to_numpy())
+
+    def test_roll_up(self):
+        df = get_yearly_data(2024, self.data)
+        cell = self.cube.get(regime_type="Full democracy", year=2024)
+        full = df[df["RegimeType"] == "Full democracy"]
+        self.assertEqual(cell["Count"], len(full))
+        self.assertAlmostEqual(cell["Max"], full["DemocracyIndex"].max())
+        self.assertEqual(cell["Countries"], tuple(sorted(full["Country"])))
+        self.assertEqual(self.cube.get()["Count"], len(self.data.df))
+
+
+if __name__ == "__main__":
+    unittest.main()
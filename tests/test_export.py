@@ -0,0 +1,74 @@
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, "src")
+from export import ExportJob, export  # noqa: E402
+from plots import write_figure  # noqa: E402
+
+
+class TestExportPipeline(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.written = []
+        self.pending = 0
+        self.max_pending = 0
+
+    def build(self, write: bool, fail: bool = False) -> str:
+        if fail:
+            raise RuntimeError("Build failed.")
+        with self.lock:
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        return "figure"
+
+    def write(self, fig: str, name: str, formats: tuple) -> None:
+        time.sleep(0.01)
+        with self.lock:
+            self.written.append((name, formats[0]))
+            self.pending -= 1
+
+    def test_error_isolation(self):
+        jobs = [ExportJob(name, self.build, {"fail": name == "b"},
+                          formats=("html",), writer=self.write)
+                for name in ["a", "b", "c"]]
+        report = export(jobs)
+        self.assertListEqual(sorted(self.written), [("a", "html"),
+                                                    ("c", "html")])
+        errors = report.dropna(subset=["Error"])
+        self.assertListEqual(errors[["Job", "Stage"]].values.tolist(),
+                             [["b", "build"]])
+        self.assertIn("Build failed.", errors["Error"].iloc[0])
+
+    def test_bounded_queue(self):
+        jobs = [ExportJob(str(i), self.build, formats=("html",),
+                          writer=self.write) for i in range(20)]
+        export(jobs, n_writers=1, queue_size=2)
+        self.assertEqual(len(self.written), 20)
+        # At most the queued figures, the one being written and the one
+        # just built are waiting at any time
+        self.assertLessEqual(self.max_pending, 2 + 1 + 1)
+
+    def test_serialized_images(self):
+        test = self
+
+        class FakeFigure:
+            def write_image(self, path):
+                with test.lock:
+                    test.pending += 1
+                    test.max_pending = max(test.max_pending, test.pending)
+                time.sleep(0.01)
+                with test.lock:
+                    test.pending -= 1
+
+        jobs = [ExportJob(str(i), lambda write: FakeFigure(),
+                          formats=("png",), writer=write_figure)
+                for i in range(8)]
+        report = export(jobs, n_writers=4)
+        self.assertTrue(report["Error"].isna().all())
+        self.assertEqual(self.max_pending, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import sys
+import unittest
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, "src")
+from data import load_countries  # noqa: E402
+from geometry import DETAIL_LEVELS, Topology  # noqa: E402
+
+
+class TestTopology(unittest.TestCase):
+    # Maximum relative error of the total area of the countries
+    AREA_ERRORS = {"high": 0.001, "medium": 0.01, "low": 0.05}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.topology = Topology()
+        countries = load_countries()
+        cls.areas = dict(zip(countries["ADM0_A3"],
+                             shapely.area(countries.geometry.values)))
+
+    def test_detail_levels(self):
+        for detail, tolerance in DETAIL_LEVELS.items():
+            with self.subTest(detail=detail):
+                features = self.topology.to_geojson(tolerance)["features"]
+                geometries = [shapely.geometry.shape(f["geometry"])
+                              for f in features]
+                self.assertTrue(all(shapely.is_valid(geometries)))
+                self.assertTrue(all(shapely.area(geometries) > 0))
+                areas = shapely.area(geometries)
+                expected = np.array([self.areas[f["id"]] for f in features])
+                error = np.abs(areas - expected).sum() / expected.sum()
+                self.assertLess(error, self.AREA_ERRORS[detail])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, "src")
+from indicators import IndicatorStore  # noqa: E402
+from names import NameIndex  # noqa: E402
+
+
+class TestIndicatorStore(unittest.TestCase):
+    def setUp(self):
+        self.store = IndicatorStore(
+            NameIndex(["Argentina", "Chile", "Uruguay", "Peru"]))
+        self.store.add("A", pd.DataFrame({
+            "Country": ["Argentina", "Chile", "Uruguay", "Peru"] * 2,
+            "Year": [2020] * 4 + [2021] * 4,
+            "Value": [1.0, 2.0, 3.0, 4.0, 2.0, 3.0, 5.0, 4.0]}))
+
+    def test_load_wide(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "b.csv")
+            pd.DataFrame({"Name": ["Chile", "Argentina", "Atlantis", None],
+                          "2021": [6.0, 2.0, 1.0, 1.0],
+                          "2022": [7.0, 3.0, 1.0, 1.0]}).to_csv(
+                              path, index=False)
+            self.store.load("B", path, format="wide", country="Name")
+
+        np.testing.assert_array_equal(self.store.years, [2020, 2021, 2022])
+        self.assertEqual(self.store.unmatched["B"], ["Atlantis", None])
+        df = self.store.join(["A", "B"])
+        self.assertEqual(df[["Country", "Year"]].values.tolist(),
+                         [["Argentina", 2021], ["Chile", 2021]])
+        np.testing.assert_array_equal(df["B"], [2.0, 6.0])
+
+    def test_correlations(self):
+        self.store.add("B", pd.DataFrame({
+            "Country": ["Argentina", "Chile", "Uruguay", "Peru"],
+            "Year": [2021] * 4, "Value": [1.0, 5.0, 2.0, np.nan]}))
+        df = self.store.join(["A", "B"])
+        expected = np.corrcoef(df["A"], df["B"])[0, 1]
+        corr = self.store.get_correlations(["A", "B"])
+        self.assertAlmostEqual(corr.loc["A", "B"], expected)
+        self.assertAlmostEqual(corr.loc["A", "A"], 1.0)
+        yearly = self.store.get_yearly_correlations("A", "B")
+        self.assertTrue(np.isnan(yearly[2020]))
+        self.assertAlmostEqual(yearly[2021], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
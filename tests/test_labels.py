@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from src.labels import place_series_labels, spread_labels
+
+
+class TestLabels(unittest.TestCase):
+    def test_spread_labels(self):
+        y = spread_labels(np.array([5.0, 5.1, 9.9, 1.0]), min_gap=0.5,
+                          lower=0.0, upper=10.0)
+        self.assertTrue(np.all(np.diff(np.sort(y)) >= 0.5 - 1e-12))
+        self.assertTrue(np.all((y >= 0.0) & (y <= 10.0)))
+        self.assertEqual(y[3], 1.0)
+        self.assertLess(y[0], y[1])
+
+    def test_place_series_labels(self):
+        x = np.arange(10.0)
+        values = np.array([np.full(10, 2.0), np.full(10, 2.5),
+                           np.linspace(0.0, 9.0, 10)])
+        positions = place_series_labels(x, values, ["A", "B", "C"],
+                                        char_width=0.5, height=0.4,
+                                        y_range=(0.0, 10.0))
+        self.assertEqual(len(positions), 3)
+        for i, (px, py) in enumerate(positions):
+            line_y = np.interp(px, x, values[i])
+            self.assertLessEqual(abs(py - line_y), 0.4)
+        # The two labels do not overlap
+        (ax, ay), (bx, by) = positions[:2]
+        self.assertTrue(abs(ax - bx) >= 0.5 or abs(ay - by) >= 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, "src")
+from markov import RegimeTransitionModel, matrix_powers  # noqa: E402
+
+
+class TestRegimeTransitionModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model = RegimeTransitionModel()
+
+    def test_transition_matrix(self):
+        np.testing.assert_allclose(self.model.matrix.sum(axis=1), 1.0)
+        self.assertTrue((self.model.matrix >= 0).all())
+
+    def test_stationary_distribution(self):
+        distribution = self.model.get_stationary_distribution()
+        self.assertAlmostEqual(distribution.sum(), 1.0)
+        np.testing.assert_allclose(distribution @ self.model.matrix,
+                                   distribution, atol=1e-9)
+
+    def test_project(self):
+        distribution = self.model.get_distribution(2006)
+        steps = [0, 1, 5, 20]
+        expected = np.stack([distribution @ power for power in
+                             matrix_powers(self.model.matrix, steps)])
+        np.testing.assert_allclose(
+            self.model.project(steps, distribution), expected)
+        np.testing.assert_allclose(
+            self.model.project(5, distribution)[0],
+            distribution @ np.linalg.matrix_power(self.model.matrix, 5))
+
+    def test_unknown_year(self):
+        with self.assertRaises(KeyError):
+            self.model.get_distribution(1900)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.names import NameIndex, normalize_name, slugify, take_join
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NameIndex(
+            ["Ivory Coast", "Czech Republic", "Germany", "Turkey"],
+            geo=pd.DataFrame({"NAME": ["Czechia", "Germany"],
+                              "ISO_A3_EH": ["CZE", "DEU"]}))
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("Côte d'Ivoire"), "cote d ivoire")
+        self.assertEqual(normalize_name("Austral\xadasia"), "australasia")
+        self.assertEqual(slugify("Côte d'Ivoire"), "cote_d_ivoire")
+
+    def test_lookup(self):
+        countries = self.index.to_country(
+            ["Germany", "DEU", "CZE", "Côte d'Ivoire", "TURKEY", "Germny",
+             "Atlantis"])
+        self.assertListEqual(
+            list(countries),
+            ["Germany", "Germany", "Czech Republic", "Ivory Coast", "Turkey",
+             "Germany", None])
+
+    def test_coverage_report(self):
+        report = self.index.coverage_report(["Germany", "Atlantis"])
+        methods = dict(zip(report["Country"].fillna(""), report["Method"]))
+        self.assertEqual(methods["Germany"], "exact")
+        self.assertEqual(methods[""], "unmatched")
+        self.assertEqual(methods["Turkey"], "missing")
+
+    def test_take_join(self):
+        left = pd.DataFrame({"Name": ["a", "b", "c"]})
+        right = pd.DataFrame({"Value": [1.0, 2.0, 3.0]})
+        joined = take_join(left, np.array([1, -1, 0]),
+                           right, np.array([0, 1, 1]))
+        self.assertListEqual(list(joined["Name"]), ["a", "a", "b", "c"])
+        np.testing.assert_array_equal(joined["Value"],
+                                      [2.0, 3.0, np.nan, 1.0])
+
+    def test_take_join_unmatched_right(self):
+        left = pd.DataFrame({"Name": ["a", "b"]})
+        right = pd.DataFrame({"Value": [1.0, 2.0, 3.0]})
+        joined = take_join(left, np.array([0, 1]),
+                           right, np.array([-1, 1, -1]))
+        self.assertListEqual(list(joined["Name"]), ["a", "b"])
+        np.testing.assert_array_equal(joined["Value"], [np.nan, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
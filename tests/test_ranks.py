@@ -0,0 +1,30 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, "src")
+from ranks import competition_rank  # noqa: E402
+
+
+class TestCompetitionRank(unittest.TestCase):
+    def test_ties(self):
+        ranks = competition_rank(np.array([[9.0], [7.5], [7.5], [3.0]]))
+        np.testing.assert_array_equal(ranks[:, 0], [1, 2, 2, 4])
+
+    def test_missing_values(self):
+        values = np.array([[np.nan, 2.0], [5.0, np.nan], [1.0, 2.0],
+                           [5.0, 8.0]])
+        np.testing.assert_array_equal(
+            competition_rank(values),
+            [[np.nan, 2], [1, np.nan], [3, 2], [1, 1]])
+
+    def test_groups(self):
+        values = np.array([[4.0], [6.0], [6.0], [9.0], [1.0], [np.nan]])
+        groups = np.array([0, 1, 0, 1, 1, 0])
+        np.testing.assert_array_equal(competition_rank(values, groups)[:, 0],
+                                      [2, 2, 1, 1, 3, np.nan])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, "src")
+from report import expand_spec, load_spec  # noqa: E402
+
+
+class TestExpandSpec(unittest.TestCase):
+    def test_each_country(self):
+        jobs = expand_spec({"figures": [{
+            "type": "time_series_countries", "countries": "*",
+            "each": True}]})
+        names = [job.name for job in jobs]
+        self.assertEqual(len(set(names)), len(names))
+        self.assertIn("time_series_by_country_ivory_coast", names)
+
+    def test_each_name_without_country(self):
+        with self.assertRaises(ValueError):
+            expand_spec({"figures": [{
+                "type": "time_series_countries", "countries": ["Chile"],
+                "each": True, "name": "chile"}]})
+
+    def test_load_yaml(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("formats: [png]\n"
+                        "figures:\n"
+                        "  - type: map_index\n"
+                        "    years: [2006, 2024]\n")
+            spec = load_spec(path)
+        self.assertEqual([job.name for job in expand_spec(spec)],
+                         ["map_index_2006", "map_index_2024"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import gzip
+import json
+import sys
+import threading
+import unittest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, "src")
+from server import make_server  # noqa: E402
+
+
+class TestQueryServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server(port=0)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_country_series(self):
+        with urlopen(self.url + "/countries/Norway") as response:
+            payload = json.load(response)
+        self.assertEqual(payload["Region"], "Western Europe")
+        self.assertEqual(len(payload["Series"]), 17)
+
+    def test_year_frame(self):
+        with urlopen(self.url + "/years/2024") as response:
+            payload = json.load(response)
+        records = {r["Country"]: r for r in payload}
+        self.assertEqual(records["Norway"]["ISO_A3_EH"], "NOR")
+        self.assertTrue(all("ISO_A3_EH" in r for r in payload))
+
+    def test_migration_matrix(self):
+        with urlopen(self.url + "/migration/2006/2024") as response:
+            m = json.load(response)
+        self.assertEqual(len(m), 5)
+        self.assertIsNone(m[-1][-1])
+
+    def test_etag_and_gzip(self):
+        request = Request(self.url + "/regions",
+                          headers={"Accept-Encoding": "gzip"})
+        with urlopen(request) as response:
+            etag = response.headers["ETag"]
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            payload = json.loads(gzip.decompress(response.read()))
+        self.assertGreater(len(payload), 0)
+
+        request = Request(self.url + "/regions",
+                          headers={"If-None-Match": etag})
+        with self.assertRaises(HTTPError) as context:
+            urlopen(request)
+        self.assertEqual(context.exception.code, 304)
+
+    def test_unknown_route(self):
+        with self.assertRaises(HTTPError) as context:
+            urlopen(self.url + "/countries/Atlantis")
+        self.assertEqual(context.exception.code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, "src")
+from similarity import SimilarityEngine, make_synthetic_panel  # noqa: E402
+
+
+class TestSimilarityEngine(unittest.TestCase):
+    def setUp(self):
+        self.panel = pd.DataFrame(
+            [[1.0, 2.0, 3.0, 4.0],
+             [1.0, np.nan, 3.0, 4.0],
+             [4.0, 3.0, 2.0, 1.0],
+             [2.0, 3.0, 4.0, 5.0]],
+            index=["A", "B", "C", "D"], columns=[2006, 2008, 2010, 2011])
+        self.engine = SimilarityEngine(self.panel)
+
+    def test_missing_years(self):
+        d = self.engine.get_distance_matrix("euclidean")
+        self.assertAlmostEqual(d.loc["A", "B"], 0.0)
+        self.assertAlmostEqual(d.loc["A", "D"], 2.0)
+        d = self.engine.get_distance_matrix("correlation")
+        self.assertAlmostEqual(d.loc["A", "C"], 2.0)
+        self.assertAlmostEqual(d.loc["B", "D"], 0.0)
+
+    def test_dtw(self):
+        shifted = pd.DataFrame([[0, 0, 5, 5, 5], [0, 5, 5, 5, 5]],
+                               index=["A", "B"], dtype=float)
+        engine = SimilarityEngine(shifted)
+        self.assertAlmostEqual(
+            engine.get_distance_matrix("dtw", band=1).loc["A", "B"], 0.0)
+        self.assertAlmostEqual(
+            engine.get_distance_matrix("dtw", band=0).loc["A", "B"], 5.0)
+
+    def test_hierarchical(self):
+        clusters = self.engine.hierarchical(2, metric="correlation")
+        self.assertEqual(clusters["A"], clusters["B"])
+        self.assertEqual(clusters["A"], clusters["D"])
+        self.assertNotEqual(clusters["A"], clusters["C"])
+
+    def test_nearest_matches_matrix(self):
+        engine = SimilarityEngine(make_synthetic_panel(300, seed=0))
+        for metric in ["euclidean", "correlation", "dtw"]:
+            matrix = engine.get_distance_matrix(metric).to_numpy()
+            np.fill_diagonal(matrix, np.inf)
+            nearest = engine.get_nearest(k=3, metric=metric)
+            expected = np.sort(matrix, axis=1)[:, :3].ravel()
+            np.testing.assert_allclose(nearest["Distance"], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
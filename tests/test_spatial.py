@@ -0,0 +1,35 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, "src")
+from spatial import SpatialIndex  # noqa: E402
+
+
+class TestSpatialIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = SpatialIndex()
+
+    def test_annotate(self):
+        df = self.index.annotate([2.35, np.nan, 28.2, 25.0, 2.35],
+                                 [48.85, np.nan, -29.5, -30.0, np.inf], 2024)
+        self.assertListEqual(
+            df["Country"].tolist(),
+            ["France", None, "Lesotho", "South Africa", None])
+        np.testing.assert_array_equal(df["Distance"],
+                                      [0.0, np.nan, 0.0, 0.0, np.nan])
+        self.assertTrue(np.isnan(df["DemocracyIndex"][1]))
+
+    def test_nearest_fallback(self):
+        # In the Bay of Biscay, off the coast of France
+        df = self.index.annotate([-2.5], [46.0], 2024)
+        self.assertEqual(df["Country"][0], "France")
+        self.assertGreater(df["Distance"][0], 0)
+        df = self.index.annotate([-2.5], [46.0], 2024, max_distance=0.01)
+        self.assertIsNone(df["Country"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.validation import Schema
+
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        self.schema = Schema(
+            regions=["Western Europe", "Sub-Saharan Africa"],
+            regime_types=["Authoritarian", "Hybrid regime",
+                          "Flawed democracy", "Full democracy"],
+            thresholds=[4.0, 6.0, 8.0])
+        self.df = pd.DataFrame({
+            "Region": ["Western Europe", "Western Europe",
+                       "Sub-Saharan Africa"],
+            "Country": ["Norway", "France", "Mali"],
+            "RegimeType": ["Full democracy", "Flawed democracy",
+                           "Authoritarian"],
+            "2024": [9.81, 7.99, 3.0],
+            "2023": [9.81, 8.07, 3.23]})
+
+    def test_valid_table(self):
+        self.assertTrue(self.schema.validate(self.df).empty)
+
+    def test_invalid_table(self):
+        df = pd.concat([self.df, self.df.iloc[[2]]], ignore_index=True)
+        df.loc[0, "2023"] = 10.5
+        df.loc[1, "RegimeType"] = "Full democracy"
+        df.loc[2, "2023"] = np.nan
+        df.loc[3, "Region"] = "Atlantis"
+        issues = self.schema.validate(df)
+        errors = issues[issues["Severity"] == "error"]
+        self.assertListEqual(sorted(errors["Check"]),
+                             ["range", "regime", "region", "unique"])
+        self.assertListEqual(
+            list(issues.loc[issues["Severity"] == "warning", "Country"]),
+            ["Mali"])
+
+
+if __name__ == "__main__":
+    unittest.main()